@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class EmployeesConfig(AppConfig):
+    name = 'employees'
+
+    def ready(self):
+        # Connect the receivers that keep derived data in sync with writes
+        from . import caching, replica, salary_stats, skills, watcher  # noqa: F401
+        watcher.connect_write_version_receiver()
+        # Drop cached JWT lookups when users change
+        from . import authentication  # noqa: F401
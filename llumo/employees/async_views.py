@@ -0,0 +1,297 @@
+"""
+Asynchronous employee endpoints for ASGI servers (``uvicorn llumo.asgi:application``).
+
+The DRF views block a worker thread for every Mongo round trip.  These
+Django async views talk to Mongo through Motor instead, so one process can
+keep many requests in flight, and ``list`` runs its count and find
+concurrently.  They mirror the query parameters and response bodies of
+``EmployeeViewSet`` under ``/api/async/``, but skip the response cache and
+the browsable API.
+
+Motor is optional: without it every endpoint here fails with
+``ImproperlyConfigured``, while the synchronous API keeps working.
+
+Under WSGI Django runs each async view on an event loop of its own, so every
+request would build (and drop) a Motor client and its pool.  There the
+routes hand the request to the matching ``EmployeeViewSet`` view instead.
+"""
+
+import asyncio
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import bulk, salary_stats
+from .authentication import CachedJWTAuthentication
+from .encoders import dumps
+from .instrumentation import timed
+from .mongo import get_async_collection
+from .pagination import (COUNT_MODES, ESTIMATED, EXACT, LIST_SORT, NONE, InvalidCursor, cursor_plan,
+                         offset_pagination, parse_page, uncounted_pagination)
+from .projection import InvalidFields, parse_fields, projected_fields
+from .repository import EmployeeRepository, to_instance
+from .serializers import EmployeeSerializer, EmployeeWriteSerializer
+from .signals import employees_changed
+from .views import EmployeeViewSet, department_query, parse_skills, skills_query
+
+_authentication = CachedJWTAuthentication()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def error_response(message, status=400):
+    return json_response({'error': message}, status)
+
+
+def authenticate(request):
+    """
+    Run the JWT check in a worker thread (a cache miss loads the user
+    through the ORM).
+
+    Returns ``(user, None)`` or ``(None, message)``.
+    """
+    try:
+        result = _authentication.authenticate(request)
+    except AuthenticationFailed as e:
+        return None, e.detail
+    if result is None:
+        return None, 'Authentication credentials were not provided.'
+    return result[0], None
+
+
+def jwt_required(view):
+    """Same authentication and permission as the DRF views: a valid JWT"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        with timed('auth'):
+            user, message = await sync_to_async(authenticate)(request)
+        if user is None:
+            response = json_response({'detail': message}, 401)
+            response['WWW-Authenticate'] = _authentication.authenticate_header(request)
+            return response
+        request.user = user
+        return await view(request, *args, **kwargs)
+    # Token authentication does not use cookies, so CSRF does not apply (as
+    # with DRF's views); Django 3.1's csrf_exempt cannot wrap coroutines
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def asgi_only(sync_view):
+    """Serve the request with ``sync_view`` unless it came in through ASGI"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if not isinstance(request, ASGIRequest):
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+            return await view(request, *args, **kwargs)
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def methods(*allowed):
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in allowed:
+                response = json_response({'detail': f'Method "{request.method}" not allowed.'}, 405)
+                response['Allow'] = ', '.join(allowed)
+                return response
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def find_page(collection, query, params, projection=None):
+    """
+    One page of ``query`` in the list/search pagination contract.
+
+    Returns ``(documents, pagination)``; raises ``ValueError`` for bad
+    parameters and ``InvalidCursor`` for bad tokens.
+    """
+    page, page_size = parse_page(params)
+
+    token = params.get('cursor')
+    if token or params.get('pagination') == 'cursor':
+        plan = cursor_plan(query, token, projection)
+        documents = await (collection.find(plan.query, plan.projection)
+                           .sort(plan.sort)
+                           .limit(page_size + 1)
+                           .to_list(page_size + 1))
+        return plan.page(documents, page_size)
+
+    count = params.get('count', EXACT)
+    if count not in COUNT_MODES:
+        raise ValueError('count must be "exact", "estimated" or "none".')
+
+    limit = page_size + 1 if count == NONE else page_size
+    cursor = (collection.find(query, projection)
+              .sort(LIST_SORT)
+              .skip((page - 1) * page_size)
+              .limit(limit))
+    if count == NONE:
+        documents = await cursor.to_list(limit)
+        return documents[:page_size], uncounted_pagination(page, page_size, len(documents) > page_size)
+
+    # Both round trips are in flight at the same time
+    total_count, documents = await asyncio.gather(
+        estimate_count(collection, query) if count == ESTIMATED else collection.count_documents(query),
+        cursor.to_list(page_size),
+    )
+    pagination = offset_pagination(total_count, page, page_size)
+    if count == ESTIMATED:
+        pagination['total_count_estimated'] = True
+    return documents, pagination
+
+
+async def estimate_count(collection, query):
+    """Async counterpart of ``pagination.estimate_count``, without the count cache"""
+    if not query:
+        return await collection.estimated_document_count()
+    if set(query) == {'department'} and isinstance(query['department'], str):
+        stats = await get_async_collection(salary_stats.STATS_COLLECTION).find_one({'_id': query['department']})
+        return stats['count'] if stats else 0
+    return await collection.count_documents(query)
+
+
+@asgi_only(EmployeeViewSet.as_view({'get': 'list', 'post': 'create'}))
+@methods('GET', 'POST')
+@jwt_required
+async def employee_collection(request):
+    if request.method == 'POST':
+        return await create_employee(request)
+    return await list_employees(request)
+
+
+async def list_employees(request):
+    try:
+        projection = parse_fields(request.GET.get('fields'))
+        employees, pagination = await find_page(
+            get_async_collection(), department_query(request.GET), request.GET, projection)
+    except (InvalidFields, InvalidCursor) as e:
+        return error_response(str(e))
+    except ValueError as e:
+        return error_response(str(e))
+    return json_response({'results': employees, 'pagination': pagination})
+
+
+@asgi_only(EmployeeViewSet.as_view({'get': 'search'}))
+@methods('GET')
+@jwt_required
+async def employee_search(request):
+    skills = parse_skills(request.GET)
+    if not skills:
+        return error_response('Skill parameter is required.')
+
+    match = request.GET.get('match', 'all')
+    if match not in ('all', 'any'):
+        return error_response('match must be "all" or "any".')
+
+    try:
+        projection = parse_fields(request.GET.get('fields'))
+        employees, pagination = await find_page(
+            get_async_collection(), skills_query(skills, match), request.GET, projection)
+    except (InvalidFields, InvalidCursor) as e:
+        return error_response(str(e))
+    except ValueError as e:
+        return error_response(str(e))
+    return json_response({'results': employees, 'pagination': pagination})
+
+
+@asgi_only(EmployeeViewSet.as_view({'get': 'avg_salary'}))
+@methods('GET')
+@jwt_required
+async def employee_avg_salary(request):
+    exact = request.GET.get('exact', '').lower() in ('1', 'true', 'yes')
+    stats = salary_stats.stats_from([doc async for doc in get_async_collection(salary_stats.STATS_COLLECTION).find()])
+    if stats is None:
+        # First request: build the materialized aggregates once
+        stats = await sync_to_async(salary_stats.rebuild)()
+    return json_response(salary_stats.summarize(stats, exact))
+
+
+async def create_employee(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return error_response('Request body must be JSON.')
+    serializer = EmployeeWriteSerializer(data=data)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, 400)
+
+    doc = bulk.to_document(serializer.validated_data)
+    try:
+        # insert_one adds _id to the dict it is given
+        await get_async_collection().insert_one(dict(doc))
+    except DuplicateKeyError:
+        return error_response('employee_id must be unique')
+    await send_changes([(None, doc)])
+    return json_response(EmployeeSerializer(to_instance(doc)).data, 201)
+
+
+@asgi_only(EmployeeViewSet.as_view(
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}))
+@methods('GET', 'PUT', 'PATCH', 'DELETE')
+@jwt_required
+async def employee_detail(request, employee_id):
+    collection = get_async_collection()
+    projection = EmployeeRepository.projection
+
+    if request.method == 'GET':
+        try:
+            fields = parse_fields(request.GET.get('fields'))
+        except InvalidFields as e:
+            return error_response(str(e))
+        employee = await collection.find_one({'employee_id': employee_id}, fields or projection)
+        if employee is None:
+            return error_response('Employee not found', 404)
+        serializer = EmployeeSerializer(to_instance(employee), fields=projected_fields(fields) if fields else None)
+        return json_response(serializer.data)
+
+    if request.method == 'DELETE':
+        # With _id, as EmployeeRepository.delete, for the change watcher
+        deleted = await collection.find_one_and_delete({'employee_id': employee_id})
+        if deleted is None:
+            return error_response('Employee not found', 404)
+        await send_changes([(deleted, None)])
+        return json_response({'success': 'Employee deleted successfully'})
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return error_response('Request body must be JSON.')
+    if not isinstance(data, dict):
+        return error_response('Request body must be a JSON object.')
+    if data.get('employee_id', employee_id) != employee_id:
+        return error_response('employee_id cannot be changed')
+    data['employee_id'] = employee_id
+    serializer = EmployeeWriteSerializer(data=data, partial=(request.method == 'PATCH'))
+    if not serializer.is_valid():
+        return json_response(serializer.errors, 400)
+
+    fields = bulk.to_document(serializer.validated_data)
+    before = await collection.find_one_and_update(
+        {'employee_id': employee_id},
+        {'$set': fields},
+        projection=projection,
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return error_response('Employee not found', 404)
+    after = dict(before, **fields)
+    await send_changes([(before, after)])
+    return json_response(EmployeeSerializer(to_instance(after)).data)
+
+
+async def send_changes(changes):
+    """Notify the (synchronous) derived-data receivers off the event loop"""
+    await sync_to_async(employees_changed.send)(sender=employee_detail, changes=changes)
@@ -0,0 +1,207 @@
+"""
+Full-collection schema audit.
+
+The collection is split into ObjectId ``_id`` ranges of roughly equal size,
+plus one partition for every other ``_id`` type (range queries only match
+values of the bounds' type), and every partition is scanned by a worker
+process with the validators compiled in ``schemas.py``.  Workers only fetch the fields the schema knows about,
+count violations per rule and write the IDs of offending documents to a
+part file.  Finished ranges are recorded in a checkpoint file so an
+interrupted audit resumes where it stopped.
+"""
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bson import json_util
+
+from .schemas import EMPLOYEE_VALIDATOR, USER_VALIDATOR
+
+# collection name, compiled schema, field identifying a document in reports
+TARGETS = {
+    'employees': ('employees', EMPLOYEE_VALIDATOR, 'employee_id'),
+    'users': ('auth_user', USER_VALIDATOR, 'username'),
+}
+
+BATCH_SIZE = 5000
+
+# Bounds of the partition holding the documents with non-ObjectId _ids
+OTHER_IDS = ('other', 'other')
+
+OBJECT_IDS = {'$type': 'objectId'}
+
+
+def partition_bounds(collection, partitions):
+    """
+    Split the ObjectId ``_id``s into ``partitions`` ranges.
+
+    Returns ``[(lower, upper), ...]`` where ``lower`` is inclusive, ``upper``
+    exclusive and ``None`` means unbounded, followed by ``OTHER_IDS`` for
+    every other ``_id`` type.  Boundaries are read off one ordered pass over
+    the ``_id`` index, which stops at the last boundary.
+    """
+    total = collection.estimated_document_count()
+    partitions = max(min(partitions, total), 1)
+    step = max(total // partitions, 1)
+    boundaries = []
+    if partitions > 1:
+        cursor = collection.find({'_id': OBJECT_IDS}, {'_id': 1}, batch_size=BATCH_SIZE).sort('_id', 1)
+        for position, doc in enumerate(cursor):
+            if position and position % step == 0:
+                boundaries.append(doc['_id'])
+                if len(boundaries) == partitions - 1:
+                    break
+    lowers = [None] + boundaries
+    uppers = boundaries + [None]
+    return list(zip(lowers, uppers)) + [OTHER_IDS]
+
+
+def range_query(lower, upper):
+    if (lower, upper) == OTHER_IDS:
+        return {'_id': {'$not': OBJECT_IDS}}
+    query = dict(OBJECT_IDS)
+    if lower is not None:
+        query['$gte'] = lower
+    if upper is not None:
+        query['$lt'] = upper
+    return {'_id': query}
+
+
+def init_worker():
+    """Process pool initializer: make Django usable under spawn as well as fork"""
+    import django
+    from django.apps import apps
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'llumo.settings')
+    if not apps.ready:
+        django.setup()
+
+
+def scan_partition(target, index, lower, upper, ids_path, batch_size=BATCH_SIZE):
+    """
+    Validate every document in one ``_id`` range.
+
+    Offending documents are written to ``ids_path`` as
+    ``<id>\\t<rule>,<rule>`` lines.  Returns a JSON-serialisable summary.
+    """
+    # Imported here: get_collection() builds a fresh client after fork
+    from .mongo import get_collection
+
+    collection_name, validator, id_field = TARGETS[target]
+    projection = dict.fromkeys(validator.fields, 1)
+
+    scanned = invalid = 0
+    violations = Counter()
+    with open(ids_path, 'w') as part:
+        cursor = get_collection(collection_name).find(
+            range_query(lower, upper), projection, batch_size=batch_size)
+        for doc in cursor:
+            scanned += 1
+            errors = validator.violations(doc)
+            if errors:
+                invalid += 1
+                violations.update(errors)
+                part.write(f"{doc.get(id_field, doc['_id'])}\t{','.join(errors)}\n")
+
+    return {'index': index, 'scanned': scanned, 'invalid': invalid, 'violations': dict(violations)}
+
+
+class Checkpoint:
+    """Partition bounds and finished partitions, persisted as JSON"""
+
+    def __init__(self, path, target, bounds, completed=None):
+        self.path = path
+        self.target = target
+        self.bounds = bounds
+        self.completed = completed or {}
+
+    @classmethod
+    def load(cls, path, target):
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json_util.loads(f.read())
+        if data['target'] != target:
+            raise ValueError(f"Checkpoint {path} belongs to an audit of {data['target']}")
+        bounds = [tuple(pair) for pair in data['bounds']]
+        completed = {int(index): summary for index, summary in data['completed'].items()}
+        return cls(path, target, bounds, completed)
+
+    def save(self):
+        if not self.path:
+            return
+        data = {'target': self.target, 'bounds': self.bounds, 'completed': self.completed}
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json_util.dumps(data))
+        os.replace(tmp_path, self.path)
+
+
+def part_path(output, index):
+    return f'{output}.part{index:04d}'
+
+
+def run_audit(target, workers=None, partitions=None, output=None, checkpoint_path=None,
+              batch_size=BATCH_SIZE, progress=None):
+    """
+    Audit a whole collection and return the combined summary.
+
+    ``progress(done, total, summary)`` is called after each finished
+    partition.  With ``output``, offending IDs are written there in
+    partition order once every partition is done.
+    """
+    from .mongo import get_collection
+
+    workers = workers or os.cpu_count() or 1
+    checkpoint = Checkpoint.load(checkpoint_path, target)
+    if checkpoint is None:
+        collection = get_collection(TARGETS[target][0])
+        bounds = partition_bounds(collection, partitions or workers * 4)
+        checkpoint = Checkpoint(checkpoint_path, target, bounds)
+        checkpoint.save()
+
+    pending = [i for i in range(len(checkpoint.bounds)) if i not in checkpoint.completed]
+    total = len(checkpoint.bounds)
+
+    def record(summary):
+        checkpoint.completed[summary['index']] = summary
+        checkpoint.save()
+        if progress:
+            progress(len(checkpoint.completed), total, summary)
+
+    def path_for(index):
+        return part_path(output, index) if output else os.devnull
+
+    if workers == 1:
+        for i in pending:
+            lower, upper = checkpoint.bounds[i]
+            record(scan_partition(target, i, lower, upper, path_for(i), batch_size))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            futures = [
+                executor.submit(scan_partition, target, i, *checkpoint.bounds[i], path_for(i), batch_size)
+                for i in pending
+            ]
+            for future in as_completed(futures):
+                record(future.result())
+
+    if output:
+        with open(output, 'w') as out:
+            for i in range(total):
+                path = part_path(output, i)
+                if os.path.exists(path):
+                    with open(path) as part:
+                        out.write(part.read())
+                    os.remove(path)
+
+    summary = {'partitions': total, 'scanned': 0, 'invalid': 0, 'violations': Counter()}
+    for result in checkpoint.completed.values():
+        summary['scanned'] += result['scanned']
+        summary['invalid'] += result['invalid']
+        summary['violations'].update(result['violations'])
+    summary['violations'] = dict(summary['violations'].most_common())
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return summary
@@ -0,0 +1,118 @@
+"""
+JWT authentication with a per-process cache of verified tokens.
+
+``JWTAuthentication`` verifies the token signature and then loads the user
+through Djongo on every request.  ``CachedJWTAuthentication`` remembers the
+result for each raw token in a bounded LRU, so a token that was verified
+recently costs one dictionary lookup.
+
+An entry lives for ``EMPLOYEE_AUTH_CACHE_TTL`` seconds at most and never
+past the token's own ``exp``.  Entries are dropped when the user is saved or
+deleted (which covers ``UserProfileView`` updates and deactivation).  The
+cache is per process and access tokens are not revocable (blacklisting only
+applies to refresh tokens), so a change made in another process is picked up
+when the entry expires: revocation is bounded by the TTL.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of ``raw token -> (user, validated token, expires at)``.
+
+    The raw token is the key, so only the exact bytes that were verified can
+    hit an entry.  Entries are also indexed by user so they can be
+    invalidated without the token.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, raw_token):
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                self._remove(raw_token)
+                return None
+            self._entries.move_to_end(raw_token)
+            return entry[0], entry[1]
+
+    def set(self, raw_token, user, validated_token, ttl):
+        expires_at = min(time.time() + ttl, validated_token.get('exp', float('inf')))
+        with self._lock:
+            if raw_token in self._entries:
+                self._remove(raw_token)
+            self._entries[raw_token] = (user, validated_token, expires_at)
+            self._by_user.setdefault(user.pk, set()).add(raw_token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for raw_token in list(self._by_user.get(user_id, ())):
+                self._remove(raw_token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _remove(self, raw_token):
+        user, _, _ = self._entries.pop(raw_token)
+        tokens = self._by_user.get(user.pk)
+        if tokens is not None:
+            tokens.discard(raw_token)
+            if not tokens:
+                del self._by_user[user.pk]
+
+
+token_cache = TokenCache(getattr(settings, 'EMPLOYEE_AUTH_CACHE_SIZE', 10000))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = token_cache.get(raw_token)
+        if cached is not None:
+            user, validated_token = cached
+            # Views may modify request.user; keep the cached instance pristine
+            return copy.copy(user), validated_token
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        ttl = getattr(settings, 'EMPLOYEE_AUTH_CACHE_TTL', 300)
+        if ttl > 0:
+            token_cache.set(raw_token, copy.copy(user), validated_token, ttl)
+        return user, validated_token
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
@@ -0,0 +1,172 @@
+"""
+Batched employee writes.
+
+Rows are validated in memory, then written with unordered ``bulk_write``
+so one bad row does not stop the rest of the batch.  Duplicate employee IDs
+are rejected by the unique ``employee_id`` index instead of a lookup per row.
+
+Bulk updates and deletes select employees by ID list or filter and run as a
+single ``update_many``/``delete_many``.
+"""
+
+from datetime import date, datetime, time
+
+from django.utils.datastructures import MultiValueDict
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .facets import FILTER_PARAMS, InvalidQuery, build_match
+from .mongo import get_collection
+from .schemas import EMPLOYEE_SCHEMA
+
+DUPLICATE_KEY = 11000
+DOCUMENT_VALIDATION_FAILURE = 121
+
+# Rows per bulk_write call
+BATCH_SIZE = 1000
+
+
+def to_document(validated_data):
+    """Convert serializer output to the BSON shape Djongo stores"""
+    doc = dict(validated_data)
+    joining_date = doc.get('joining_date')
+    if isinstance(joining_date, date) and not isinstance(joining_date, datetime):
+        doc['joining_date'] = datetime.combine(joining_date, time.min)
+    return doc
+
+
+def write_documents(documents, upsert=False, batch_size=BATCH_SIZE):
+    """
+    Write ``documents`` with unordered ``bulk_write`` batches.
+
+    Returns a list with one ``(status, message)`` entry per document where
+    status is ``created``, ``updated``, ``duplicate``, ``invalid`` or
+    ``error``.
+    """
+    collection = get_collection()
+    outcomes = []
+    for start in range(0, len(documents), batch_size):
+        batch = documents[start:start + batch_size]
+        if upsert:
+            requests = [
+                UpdateOne({'employee_id': doc['employee_id']}, {'$set': doc}, upsert=True)
+                for doc in batch
+            ]
+        else:
+            # insert_one/InsertOne add _id to the dict; keep the caller's copy clean
+            requests = [InsertOne(dict(doc)) for doc in batch]
+
+        try:
+            result = collection.bulk_write(requests, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+
+        batch_outcomes = [('updated', None) if upsert else ('created', None)] * len(batch)
+        for upserted in result.get('upserted', []):
+            batch_outcomes[upserted['index']] = ('created', None)
+        for error in result.get('writeErrors', []):
+            if error.get('code') == DUPLICATE_KEY:
+                batch_outcomes[error['index']] = ('duplicate', 'employee_id must be unique')
+            elif error.get('code') == DOCUMENT_VALIDATION_FAILURE:
+                batch_outcomes[error['index']] = ('invalid', 'Document failed schema validation')
+            else:
+                batch_outcomes[error['index']] = ('error', error.get('errmsg'))
+        outcomes.extend(batch_outcomes)
+    return outcomes
+
+
+def existing_documents(employee_ids):
+    """Current documents for ``employee_ids``, keyed by employee_id"""
+    cursor = get_collection().find({'employee_id': {'$in': list(employee_ids)}}, {'_id': 0})
+    return {doc['employee_id']: doc for doc in cursor}
+
+
+# Bulk PATCH/DELETE: many employees selected by ID list and/or filter
+
+NUMERIC_TYPES = ['int', 'long', 'double', 'decimal']
+
+
+def selection_query(data, max_ids=None):
+    """
+    Mongo filter for the ``employee_ids`` list and/or ``filter`` object of a
+    bulk PATCH/DELETE body.  The filter takes the ``/employees/query/``
+    parameters.  Raises ``InvalidQuery``; an empty selection is refused so a
+    missing filter never hits every employee.
+    """
+    clauses = []
+
+    employee_ids = data.get('employee_ids')
+    if employee_ids is not None:
+        if not isinstance(employee_ids, list) or not all(isinstance(i, str) for i in employee_ids):
+            raise InvalidQuery('employee_ids must be a list of strings.')
+        if not employee_ids:
+            raise InvalidQuery('employee_ids cannot be empty.')
+        if max_ids is not None and len(employee_ids) > max_ids:
+            raise InvalidQuery(f'At most {max_ids} employee_ids per request.')
+        clauses.append({'employee_id': {'$in': employee_ids}})
+
+    filters = data.get('filter')
+    if filters is not None:
+        if not isinstance(filters, dict):
+            raise InvalidQuery('filter must be an object.')
+        unknown = [name for name in filters if name not in FILTER_PARAMS]
+        if unknown:
+            raise InvalidQuery(f"Unknown filter(s): {', '.join(unknown)}. Allowed: {', '.join(FILTER_PARAMS)}.")
+        params = MultiValueDict()
+        for name, value in filters.items():
+            values = value if isinstance(value, list) else [value]
+            params.setlist(name, [str(item) for item in values])
+        match = build_match(params)
+        if match:
+            clauses.append(match)
+
+    if not clauses:
+        raise InvalidQuery('Select employees with employee_ids or a non-empty filter.')
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def raised_salary(percent):
+    """``$salary`` increased by ``percent`` and rounded to an int; non-numbers are left alone"""
+    return {'$cond': [
+        {'$in': [{'$type': '$salary'}, NUMERIC_TYPES]},
+        {'$toInt': {'$round': [{'$multiply': ['$salary', 1 + percent / 100]}, 0]}},
+        '$salary',
+    ]}
+
+
+def update_employees(query, fields=None, salary_increase_pct=None):
+    """
+    Apply ``fields`` and/or a percentage salary change to every employee
+    matching ``query`` with one ``update_many``.
+
+    A raise that would take the best paid match past the schema's maximum
+    is refused up front (``InvalidQuery``) so the update never stops half way.
+    Returns ``(matched, modified)``.
+    """
+    collection = get_collection()
+    fields = fields or {}
+    if salary_increase_pct is None:
+        result = collection.update_many(query, {'$set': fields})
+        return result.matched_count, result.modified_count
+
+    maximum = EMPLOYEE_SCHEMA['$jsonSchema']['properties']['salary']['maximum']
+    highest = next(collection.aggregate([
+        {'$match': {'$and': [query, {'salary': {'$type': 'number'}}]}},
+        {'$group': {'_id': None, 'max': {'$max': '$salary'}}},
+    ]), None)
+    if highest is not None and round(highest['max'] * (1 + salary_increase_pct / 100)) > maximum:
+        raise InvalidQuery(
+            f"salary_increase_pct would take salaries above {maximum} "
+            f"(highest matching salary: {highest['max']})."
+        )
+
+    # An update pipeline can compute the new salary from the old one
+    stage = {name: {'$literal': value} for name, value in fields.items()}
+    stage['salary'] = raised_salary(salary_increase_pct)
+    result = collection.update_many(query, [{'$set': stage}])
+    return result.matched_count, result.modified_count
+
+
+def delete_employees(query):
+    """Delete every employee matching ``query``; returns the number deleted"""
+    return get_collection().delete_many(query).deleted_count
@@ -0,0 +1,145 @@
+"""
+Response cache for the employee read endpoints.
+
+Rendered responses are cached per endpoint, keyed on the normalised query
+parameters, for ``EMPLOYEE_CACHE_TTL`` seconds in the cache named by
+``EMPLOYEE_CACHE_ALIAS`` (the local-memory ``default`` cache unless
+configured otherwise).  Every key also includes a generation number that is
+bumped on each employee write, so a write makes all cached responses
+unreachable at once instead of deleting them one by one.
+
+Each cached response carries a strong ETag (a hash of the body); a matching
+``If-None-Match`` gets ``304 Not Modified`` without re-serialising anything.
+
+With the local-memory backend the generation is per process; use a shared
+backend (memcached, redis) to invalidate across workers.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+
+from .signals import employees_changed
+
+GENERATION_KEY = 'employees:generation'
+
+
+def get_cache():
+    return caches[getattr(settings, 'EMPLOYEE_CACHE_ALIAS', 'default')]
+
+
+def cache_ttl():
+    return getattr(settings, 'EMPLOYEE_CACHE_TTL', 30)
+
+
+def generation():
+    """Current write generation of the employees collection"""
+    cache = get_cache()
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        # Start from the clock so an evicted counter never repeats old keys
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def invalidate():
+    """Make every cached response stale"""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def cache_key(namespace, request):
+    params = sorted(
+        (key, sorted(request.query_params.getlist(key)))
+        for key in request.query_params
+    )
+    raw = repr((params, request.accepted_media_type)).encode()
+    return f'employees:response:{namespace}:{generation()}:{hashlib.sha1(raw).hexdigest()}'
+
+
+def make_etag(body):
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def if_none_match(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return etag in [tag.strip() for tag in header.split(',')] or header.strip() == '*'
+
+
+def cached_response(namespace):
+    """
+    Cache decorator for viewset handlers returning JSON.
+
+    Only successful responses rendered as JSON are cached.  Streaming
+    responses are passed through and stored once fully sent, so the ETag is
+    available from the next request on.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            if not getattr(settings, 'EMPLOYEE_CACHE_ENABLED', True) or \
+                    request.accepted_renderer.format != 'json':
+                return handler(self, request, *args, **kwargs)
+
+            cache = get_cache()
+            key = cache_key(namespace, request)
+            entry = cache.get(key)
+            if entry is not None:
+                etag, body, content_type = entry
+                return build_response(request, etag, body, content_type, hit=True)
+
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            if isinstance(response, StreamingHttpResponse):
+                response.streaming_content = store_when_sent(
+                    cache, key, response.streaming_content, response['Content-Type'])
+                response['X-Cache'] = 'MISS'
+                return response
+
+            renderer = request.accepted_renderer
+            body = renderer.render(response.data, request.accepted_media_type,
+                                   self.get_renderer_context())
+            content_type = f'{renderer.media_type}; charset={renderer.charset}'
+            etag = make_etag(body)
+            cache.set(key, (etag, body, content_type), cache_ttl())
+            return build_response(request, etag, body, content_type, hit=False)
+        return wrapper
+    return decorator
+
+
+def store_when_sent(cache, key, chunks, content_type):
+    sent = []
+    for chunk in chunks:
+        sent.append(chunk)
+        yield chunk
+    body = b''.join(sent)
+    cache.set(key, (make_etag(body), body, content_type), cache_ttl())
+
+
+def build_response(request, etag, body, content_type, hit):
+    if if_none_match(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+    response['ETag'] = etag
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    # Responses require authentication; keep them out of shared caches
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@receiver(employees_changed)
+def invalidate_responses(sender, **kwargs):
+    invalidate()
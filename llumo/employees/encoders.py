@@ -0,0 +1,70 @@
+"""
+JSON encoding for Mongo documents.
+
+BSON types (ObjectId, datetime, Decimal128, raw BSON documents) are handled
+by the encoder itself, so cursor output can be serialised in one pass
+without fixing up every document in Python first.  orjson is used when it is
+installed and the standard library encoder otherwise.
+"""
+
+import decimal
+import json
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from bson.raw_bson import RawBSONDocument
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def bson_default(obj):
+    """Fallback for types the JSON backend does not know about"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        obj = obj.to_decimal()
+    if isinstance(obj, decimal.Decimal):
+        # Same coercion as DRF's encoder
+        return float(obj)
+    if isinstance(obj, RawBSONDocument):
+        # Views may hand over undecoded BSON; inflate it only here
+        return dict(obj.items())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class MongoJSONEncoder(JSONEncoder):
+    """DRF's JSON encoder plus BSON types"""
+
+    def default(self, obj):
+        try:
+            return bson_default(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+_encoder = MongoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+if orjson is not None:
+    # Naive datetimes and dates come out exactly like DRF's encoder; UTC
+    # datetimes get the same trailing "Z"
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj, indent=None):
+    """Serialise ``obj`` to UTF-8 JSON bytes"""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=bson_default, option=options)
+        except TypeError:
+            # Something only DRF's encoder knows (lazy strings, querysets...)
+            pass
+    if indent:
+        return json.dumps(obj, cls=MongoJSONEncoder, ensure_ascii=False, indent=indent).encode()
+    return _encoder.encode(obj).encode()
@@ -0,0 +1,208 @@
+"""
+Faceted employee queries for ``/employees/query/``.
+
+The filters (department, salary range, joining-date range, skills) are
+compiled into one ``$match``; the page and the facet counts come back from
+the same aggregation through ``$facet``:
+
+- ``results``/``total``: the requested page and the number of matches
+- ``department``: matches per department
+- ``skills``: the most common skills among the matches
+- ``salary``: matches per salary bucket (``SALARY_BUCKETS``)
+
+``$match`` and ``$sort`` come before ``$facet`` so they can use the same
+indexes as ``list``; the facet branches only see the matching documents.
+Facet counts describe the whole filtered set, including the filter on the
+facet's own field.
+"""
+
+from datetime import date, datetime, time
+
+from django.conf import settings
+
+from .pagination import LIST_SORT, offset_pagination
+from .salary_stats import SALARY_BUCKETS
+
+SORT_FIELDS = ('employee_id', 'name', 'department', 'salary', 'joining_date')
+
+# Parameters build_match() understands
+FILTER_PARAMS = ('department', 'salary_min', 'salary_max', 'joining_date_from', 'joining_date_to',
+                 'skill', 'match')
+
+SKILL_FACET_LIMIT = 20
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def split_values(query_params, name):
+    """Values of a repeatable, comma separated parameter, without duplicates"""
+    values = []
+    for value in query_params.getlist(name):
+        for item in value.split(','):
+            item = item.strip()
+            if item and item not in values:
+                values.append(item)
+    return values
+
+
+def parse_int(query_params, name):
+    value = query_params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidQuery(f'{name} must be an integer.')
+
+
+def parse_date(query_params, name):
+    value = query_params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidQuery(f'{name} must be a date (YYYY-MM-DD).')
+
+
+def date_range(start, end):
+    """
+    Inclusive joining-date range.
+
+    The schema allows joining_date as a date or an ISO string, and range
+    operators only compare values of the same type, so both are matched.
+    """
+    as_date, as_string = {}, {}
+    if start is not None:
+        as_date['$gte'] = datetime.combine(start, time.min)
+        as_string['$gte'] = start.isoformat()
+    if end is not None:
+        as_date['$lte'] = datetime.combine(end, time.max)
+        # Any ISO string starting with the end date sorts before this
+        as_string['$lte'] = end.isoformat() + '\uffff'
+    return {'$or': [
+        {'joining_date': {'$type': 'date', **as_date}},
+        {'joining_date': {'$type': 'string', **as_string}},
+    ]}
+
+
+def build_match(query_params):
+    """Compile the filter parameters into one ``$match`` document"""
+    clauses = []
+
+    departments = split_values(query_params, 'department')
+    if len(departments) == 1:
+        clauses.append({'department': departments[0]})
+    elif departments:
+        clauses.append({'department': {'$in': departments}})
+
+    salary_min = parse_int(query_params, 'salary_min')
+    salary_max = parse_int(query_params, 'salary_max')
+    if salary_min is not None and salary_max is not None and salary_min > salary_max:
+        raise InvalidQuery('salary_min cannot be greater than salary_max.')
+    salary = {}
+    if salary_min is not None:
+        salary['$gte'] = salary_min
+    if salary_max is not None:
+        salary['$lte'] = salary_max
+    if salary:
+        clauses.append({'salary': salary})
+
+    joined_from = parse_date(query_params, 'joining_date_from')
+    joined_to = parse_date(query_params, 'joining_date_to')
+    if joined_from is not None and joined_to is not None and joined_from > joined_to:
+        raise InvalidQuery('joining_date_from cannot be after joining_date_to.')
+    if joined_from is not None or joined_to is not None:
+        clauses.append(date_range(joined_from, joined_to))
+
+    skills = split_values(query_params, 'skill')
+    match = query_params.get('match', 'all')
+    if match not in ('all', 'any'):
+        raise InvalidQuery('match must be "all" or "any".')
+    if len(skills) == 1:
+        clauses.append({'skills': skills[0]})
+    elif skills:
+        clauses.append({'skills': {'$all' if match == 'all' else '$in': skills}})
+
+    if not clauses:
+        return {}
+    if len(clauses) == 1:
+        return clauses[0]
+    return {'$and': clauses}
+
+
+def build_sort(value):
+    """
+    ``"-salary,name"`` -> ``[('salary', -1), ('name', 1)]``.
+
+    employee_id is appended as a tie-breaker so pages are stable.
+    """
+    if not value:
+        return list(LIST_SORT)
+    sort = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        field, direction = (item[1:], -1) if item.startswith('-') else (item, 1)
+        if field not in SORT_FIELDS:
+            raise InvalidQuery(f"Cannot sort by {field}. Sortable fields: {', '.join(SORT_FIELDS)}.")
+        if field not in dict(sort):
+            sort.append((field, direction))
+    if 'employee_id' not in dict(sort):
+        sort.append(('employee_id', -1))
+    return sort
+
+
+def facet_pipeline(match, sort, skip, limit, projection=None, facets=True):
+    branches = {
+        'results': [{'$skip': skip}, {'$limit': limit}, {'$project': projection or {'_id': 0}}],
+        'total': [{'$count': 'count'}],
+    }
+    if facets:
+        branches['department'] = [
+            {'$group': {'_id': '$department', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1, '_id': 1}},
+        ]
+        branches['skills'] = [
+            {'$unwind': '$skills'},
+            {'$group': {'_id': '$skills', 'count': {'$sum': 1}}},
+            {'$sort': {'count': -1, '_id': 1}},
+            {'$limit': getattr(settings, 'EMPLOYEE_SKILL_FACET_LIMIT', SKILL_FACET_LIMIT)},
+        ]
+        branches['salary'] = [
+            {'$bucket': {
+                'groupBy': '$salary',
+                'boundaries': SALARY_BUCKETS,
+                'default': 'other',
+                'output': {'count': {'$sum': 1}},
+            }},
+        ]
+    return [{'$match': match}, {'$sort': dict(sort)}, {'$facet': branches}]
+
+
+def run_query(collection, match, sort, page, page_size, projection=None, facets=True):
+    """Return ``(documents, pagination, facets)`` from a single aggregation"""
+    pipeline = facet_pipeline(match, sort, (page - 1) * page_size, page_size, projection, facets)
+    result = next(collection.aggregate(pipeline, allowDiskUse=True))
+
+    total = result['total'][0]['count'] if result['total'] else 0
+    pagination = offset_pagination(total, page, page_size)
+    if not facets:
+        return result['results'], pagination, None
+
+    salary = []
+    for bucket in result['salary']:
+        if bucket['_id'] == 'other':
+            salary.append({'min': None, 'max': None, 'count': bucket['count']})
+            continue
+        upper = SALARY_BUCKETS[SALARY_BUCKETS.index(bucket['_id']) + 1]
+        salary.append({'min': bucket['_id'], 'max': upper - 1, 'count': bucket['count']})
+
+    return result['results'], pagination, {
+        'department': [{'value': doc['_id'], 'count': doc['count']} for doc in result['department']],
+        'skills': [{'value': doc['_id'], 'count': doc['count']} for doc in result['skills']],
+        'salary': salary,
+    }
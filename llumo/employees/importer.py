@@ -0,0 +1,279 @@
+"""
+Streaming employee import.
+
+Rows are read one at a time from CSV or NDJSON (the formats ``export``
+writes), normalised to the stored document shape and validated in chunks
+with the compiled ``EMPLOYEE_VALIDATOR``.  Valid documents are written with
+``bulk.write_documents`` on a small thread pool; only a bounded number of
+chunks is in flight, so memory stays constant whatever the input size.
+
+Rows that fail validation or are refused by MongoDB go to a reject file as
+NDJSON, with their row number and errors.  Chunks are committed to the
+checkpoint in input order, so an interrupted import is resumed by skipping
+the rows the checkpoint already covers.
+"""
+
+import csv
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+
+from . import bulk
+from .renderers import EXPORT_FIELDS
+from .schemas import EMPLOYEE_VALIDATOR
+from .signals import employees_changed
+
+FORMATS = ('csv', 'ndjson')
+
+CHUNK_SIZE = 5000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(path):
+    if path == '-':
+        raise ImportFormatError('Pass --format when reading from stdin.')
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    raise ImportFormatError(f'Cannot tell the format of {path}; pass --format.')
+
+
+def read_rows(stream, fmt):
+    """
+    Yield ``(row_number, row, error)`` for every input row.
+
+    ``row`` is a dict, or None when the row could not be parsed, in which
+    case ``error`` says why.  Row numbers start at 1 and skip the CSV header
+    and blank NDJSON lines.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        if reader.fieldnames is None:
+            return
+        for number, row in enumerate(reader, start=1):
+            if None in row:
+                yield number, None, f'Expected {len(reader.fieldnames)} columns, got more.'
+            else:
+                yield number, row, None
+        return
+
+    number = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON - {e}'
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, 'Expected a JSON object.'
+
+
+def parse_joining_date(value):
+    """ISO date or datetime string -> datetime; None if it is not one"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    try:
+        return datetime.combine(date.fromisoformat(value), time.min)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def normalise(row, fmt):
+    """
+    The document to store for ``row``, as ``(document, errors)``.
+
+    Only the exported fields are kept.  CSV cells are strings: empty cells
+    are treated as missing, ``salary`` is parsed as an integer and ``skills``
+    split on ``;``.  ``joining_date`` becomes a BSON date in both formats.
+    """
+    doc, errors = {}, {}
+    for field in EXPORT_FIELDS:
+        value = row.get(field)
+        if fmt == 'csv':
+            value = value.strip() if value else None
+            if not value:
+                continue
+            if field == 'salary':
+                try:
+                    value = int(value)
+                except ValueError:
+                    pass
+            elif field == 'skills':
+                value = [skill.strip() for skill in value.split(';') if skill.strip()]
+        elif value is None:
+            continue
+        doc[field] = value
+
+    if 'joining_date' in doc:
+        joining_date = parse_joining_date(doc['joining_date'])
+        if joining_date is None:
+            errors['joining_date'] = ['Joining date must be an ISO date (YYYY-MM-DD).']
+        else:
+            doc['joining_date'] = joining_date
+    return doc, errors
+
+
+def validate_chunk(rows, fmt):
+    """
+    Split a chunk of ``(row_number, row, error)`` into documents to write and
+    rejects.
+
+    Returns ``(documents, numbers, rejects)`` where ``numbers[i]`` is the
+    row number of ``documents[i]``.
+    """
+    documents, numbers, rejects = [], [], []
+    for number, row, error in rows:
+        if row is None:
+            rejects.append({'row': number, 'status': 'invalid', 'errors': error})
+            continue
+        doc, errors = normalise(row, fmt)
+        for field, messages in EMPLOYEE_VALIDATOR.errors(doc).items():
+            errors.setdefault(field, messages)
+        if errors:
+            rejects.append({'row': number, 'employee_id': row.get('employee_id'),
+                            'status': 'invalid', 'errors': errors, 'data': row})
+        else:
+            documents.append(doc)
+            numbers.append(number)
+    return documents, numbers, rejects
+
+
+def import_chunk(rows, fmt, upsert, batch_size):
+    """Validate and write one chunk; runs on a pool thread"""
+    documents, numbers, rejects = validate_chunk(rows, fmt)
+    counts = Counter(invalid=len(rejects))
+    outcomes = bulk.write_documents(documents, upsert=upsert, batch_size=batch_size)
+    for number, doc, (outcome, message) in zip(numbers, documents, outcomes):
+        counts[outcome] += 1
+        if outcome not in ('created', 'updated'):
+            rejects.append({'row': number, 'employee_id': doc['employee_id'],
+                            'status': outcome, 'errors': message})
+    rejects.sort(key=lambda reject: reject['row'])
+    return rows[-1][0], counts, rejects
+
+
+class Checkpoint:
+    """Rows already imported from a source, persisted as JSON"""
+
+    def __init__(self, path, source, rows_done=0, counts=None):
+        self.path = path
+        self.source = source
+        self.rows_done = rows_done
+        self.counts = Counter(counts or {})
+
+    @classmethod
+    def load(cls, path, source):
+        if not path or not os.path.exists(path):
+            return cls(path, source)
+        with open(path) as f:
+            data = json.load(f)
+        if data['source'] != source:
+            raise ValueError(f"Checkpoint {path} belongs to an import of {data['source']}")
+        return cls(path, source, data['rows_done'], data['counts'])
+
+    def save(self):
+        if not self.path:
+            return
+        data = {'source': self.source, 'rows_done': self.rows_done, 'counts': dict(self.counts)}
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_import(stream, fmt, source, upsert=False, workers=4, chunk_size=CHUNK_SIZE,
+               batch_size=bulk.BATCH_SIZE, rejects_path=None, checkpoint_path=None, progress=None):
+    """
+    Import every row of ``stream``.
+
+    ``source`` names the input in the checkpoint.  ``progress(rows_done,
+    counts)`` is called after each chunk is committed.  Returns
+    ``{'rows', 'resumed_at', 'counts'}``; counts cover the whole import,
+    including rows written before a resume.
+
+    If a chunk fails, chunks that have not started are cancelled and the
+    error is raised.  Chunks already running still finish, so a resumed
+    import may see their rows again: they come back as duplicates, or are
+    rewritten harmlessly with ``upsert``.
+    """
+    checkpoint = Checkpoint.load(checkpoint_path, source)
+    resumed_at = checkpoint.rows_done
+    written = 0
+
+    rows = (row for row in read_rows(stream, fmt) if row[0] > resumed_at)
+    rejects = open(rejects_path, 'a' if resumed_at else 'w') if rejects_path else None
+
+    def commit(future):
+        nonlocal written
+        rows_done, counts, chunk_rejects = future.result()
+        if rejects:
+            for reject in chunk_rejects:
+                rejects.write(json.dumps(reject, default=str) + '\n')
+            rejects.flush()
+        checkpoint.rows_done = rows_done
+        checkpoint.counts.update(counts)
+        checkpoint.save()
+        written += counts['created'] + counts['updated']
+        if progress:
+            progress(rows_done, checkpoint.counts)
+
+    in_flight = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Commit in input order and keep at most two chunks per thread around
+            for chunk in chunked(rows, chunk_size):
+                in_flight.append(executor.submit(import_chunk, chunk, fmt, upsert, batch_size))
+                if len(in_flight) >= workers * 2:
+                    commit(in_flight.popleft())
+            while in_flight:
+                commit(in_flight.popleft())
+    except BaseException:
+        for future in in_flight:
+            future.cancel()
+        raise
+    finally:
+        if rejects:
+            rejects.close()
+        if written:
+            # Too many rows to describe one by one: derived data is rebuilt
+            employees_changed.send(sender=run_import, changes=None)
+
+    checkpoint.remove()
+    return {'rows': checkpoint.rows_done, 'resumed_at': resumed_at, 'counts': dict(checkpoint.counts)}
@@ -0,0 +1,121 @@
+"""
+Declarative index specification for the employees collection.
+
+``create_indexes`` compares this list with the indexes that exist and only
+creates what is missing and drops what is no longer declared.  Indexes are
+matched on their key pattern and uniqueness, not their name, so indexes
+Djongo created under its own names are kept when they match.
+"""
+
+from .pagination import LIST_SORT, NEXT, seek_predicate
+
+INDEX_SPEC = [
+    # Detail routes, bulk writes and duplicate detection
+    {'keys': [('employee_id', 1)], 'unique': True},
+    # list/export with ?department=, sorted by LIST_SORT (also keyset seeks)
+    {'keys': [('department', 1), ('joining_date', -1), ('employee_id', -1)]},
+    # Unfiltered list/export in LIST_SORT order
+    {'keys': [('joining_date', -1), ('employee_id', -1)]},
+    # search: multikey on skills, then LIST_SORT order for single skills
+    {'keys': [('skills', 1), ('joining_date', -1), ('employee_id', -1)]},
+]
+
+
+def index_signature(keys, unique=False):
+    return tuple((field, int(direction)) for field, direction in keys), bool(unique)
+
+
+def diff_indexes(collection, spec=INDEX_SPEC):
+    """
+    Return ``(missing, obsolete, kept)``.
+
+    ``missing`` are spec entries without a matching index, ``obsolete`` are
+    names of existing indexes not in the spec (``_id_`` is never touched)
+    and ``kept`` are names of existing indexes that match the spec.
+    """
+    wanted = {index_signature(entry['keys'], entry.get('unique')): entry for entry in spec}
+    existing = {}
+    for index in collection.list_indexes():
+        if index['name'] == '_id_':
+            continue
+        existing[index_signature(index['key'].items(), index.get('unique'))] = index['name']
+
+    missing = [entry for signature, entry in wanted.items() if signature not in existing]
+    obsolete = [name for signature, name in existing.items() if signature not in wanted]
+    kept = [name for signature, name in existing.items() if signature in wanted]
+    return missing, obsolete, kept
+
+
+def view_queries(collection):
+    """
+    The queries EmployeeViewSet issues, filled with values from the data.
+
+    Returns ``(label, filter, sort)`` tuples for ``explain()``.
+    """
+    sample = collection.find_one({}, {'department': 1, 'skills': 1, 'employee_id': 1,
+                                      'joining_date': 1}) or {}
+    department = sample.get('department', 'Engineering')
+    skills = sample.get('skills') or ['Python']
+    employee_id = sample.get('employee_id', 'E001')
+    seek = seek_predicate(sample.get('joining_date'), employee_id, NEXT)
+
+    return [
+        ('list', {}, LIST_SORT),
+        ('list ?department=', {'department': department}, LIST_SORT),
+        ('list cursor page', seek, LIST_SORT),
+        ('list cursor page ?department=', {'$and': [{'department': department}, seek]}, LIST_SORT),
+        ('search ?skill=', {'skills': skills[0]}, LIST_SORT),
+        ('search match=all', {'skills': {'$all': skills[:2]}}, LIST_SORT),
+        ('search match=any', {'skills': {'$in': skills[:2]}}, LIST_SORT),
+        ('query ?department=&salary_min=', {'department': department, 'salary': {'$gte': 50000}}, LIST_SORT),
+        ('retrieve/update/destroy', {'employee_id': employee_id}, None),
+    ]
+
+
+def plan_stages(plan):
+    """Every stage name in a winning plan tree"""
+    if 'queryPlan' in plan:
+        # Slot-based engine output nests the classic plan
+        plan = plan['queryPlan']
+    stages = [plan.get('stage')]
+    if 'inputStage' in plan:
+        stages.extend(plan_stages(plan['inputStage']))
+    for child in plan.get('inputStages', []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def advise(collection, page_size=10, ratio_threshold=10):
+    """
+    Explain every view query and flag problems.
+
+    Returns a list of dicts with the stages used, docs examined/returned
+    and a list of warnings (COLLSCAN, in-memory SORT, high examined ratio).
+    """
+    findings = []
+    for label, query, sort in view_queries(collection):
+        cursor = collection.find(query).limit(page_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = cursor.explain()
+        stages = plan_stages(explain.get('queryPlanner', {}).get('winningPlan', {}))
+        stats = explain.get('executionStats', {})
+        examined = stats.get('totalDocsExamined', 0)
+        returned = stats.get('nReturned', 0)
+
+        warnings = []
+        if 'COLLSCAN' in stages:
+            warnings.append('COLLSCAN: no index used')
+        if 'SORT' in stages:
+            warnings.append('in-memory SORT')
+        if examined > ratio_threshold * max(returned, 1):
+            warnings.append(f'docsExamined/nReturned = {examined}/{returned}')
+        findings.append({
+            'query': label,
+            'filter': query,
+            'stages': [stage for stage in stages if stage],
+            'docs_examined': examined,
+            'returned': returned,
+            'warnings': warnings,
+        })
+    return findings
@@ -0,0 +1,353 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` attributes the time spent in each request to
+phases:
+
+- ``auth``: JWT authentication (timed by the views)
+- ``djongo``: Djongo's SQL translation, i.e. ORM time not spent in Mongo
+- ``mongo``: Mongo commands, reported by a PyMongo ``CommandListener``
+- ``render``: response rendering
+- ``app``: everything else
+
+The breakdown is sent back in a ``Server-Timing`` header and aggregated into
+histograms that ``metrics_view`` exposes in Prometheus text format.
+
+Only a ``PERFORMANCE_SAMPLE_RATE`` fraction of requests is traced; the rest
+only record their total duration, which keeps the overhead low enough to
+leave the middleware on in production.  Metrics are kept per process.
+Command sizes cost a BSON encode per command, so they are only measured with
+``PERFORMANCE_MONGO_BYTES`` on.
+
+Streaming responses (search, export) query Mongo while their body is sent,
+after the headers are gone: their trace is completed and aggregated when the
+stream closes, and they carry no ``Server-Timing`` header.
+"""
+
+import asyncio
+import hmac
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import bson
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+from pymongo import monitoring
+
+from .mongo import pool_stats
+
+# Prometheus' default buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ('auth', 'djongo', 'mongo', 'render', 'app')
+
+_current = ContextVar('request_trace', default=None)
+
+
+class RequestTrace:
+    """Timings collected while one sampled request is handled"""
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.mongo_commands = 0
+        # None unless command sizes are measured
+        self.mongo_bytes_sent = 0 if getattr(settings, 'PERFORMANCE_MONGO_BYTES', False) else None
+        self.mongo_documents_received = 0
+
+
+def current_trace():
+    return _current.get()
+
+
+@contextmanager
+def timed(phase):
+    """Add the duration of the block to ``phase`` of the current trace"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.phases[phase] += time.perf_counter() - start
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * len(BUCKETS), 0.0, 0]
+            buckets = series[0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted(self.series.items())
+            for label_values, (buckets, total, count) in items:
+                labels = ','.join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+                cumulative = 0
+                for bound, hits in zip(BUCKETS, buckets):
+                    cumulative += hits
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{labels}}} {total}')
+                lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount, *label_values):
+        with self._lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self.series.items()):
+                labels = ','.join(f'{key}="{value}"' for key, value in zip(self.labels, label_values))
+                lines.append(f'{self.name}{{{labels}}} {value}')
+        return lines
+
+
+request_duration = Histogram(
+    'employees_request_duration_seconds', 'Total request duration', ('route', 'method'))
+phase_duration = Histogram(
+    'employees_request_phase_seconds', 'Time per request phase (sampled requests)', ('route', 'phase'))
+mongo_commands = Counter(
+    'employees_mongo_commands_total', 'Mongo commands issued (sampled requests)', ('route',))
+mongo_bytes = Counter(
+    'employees_mongo_bytes_sent_total', 'BSON bytes of the Mongo commands sent (sampled requests)', ('route',))
+mongo_documents = Counter(
+    'employees_mongo_documents_received_total', 'Documents returned in cursor batches (sampled requests)',
+    ('route',))
+sampled_requests = Counter(
+    'employees_sampled_requests_total', 'Requests traced in detail', ('route',))
+
+METRICS = (request_duration, phase_duration, mongo_commands, mongo_bytes, mongo_documents, sampled_requests)
+
+
+def reply_documents(reply):
+    """Documents in a find/aggregate/getMore reply, read off the batch instead of re-encoding it"""
+    cursor = reply.get('cursor')
+    if not isinstance(cursor, dict):
+        return 0
+    return len(cursor.get('firstBatch') or cursor.get('nextBatch') or ())
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attributes Mongo command time and size to the current sampled request"""
+
+    def started(self, event):
+        trace = _current.get()
+        if trace is not None:
+            trace.mongo_commands += 1
+            if trace.mongo_bytes_sent is not None:
+                trace.mongo_bytes_sent += len(bson.encode(event.command))
+
+    def succeeded(self, event):
+        trace = _current.get()
+        if trace is not None:
+            trace.phases['mongo'] += event.duration_micros / 1e6
+            trace.mongo_documents_received += reply_documents(event.reply)
+
+    def failed(self, event):
+        trace = _current.get()
+        if trace is not None:
+            trace.phases['mongo'] += event.duration_micros / 1e6
+
+
+command_listener = MongoCommandListener()
+_registered = False
+_register_lock = threading.Lock()
+
+
+def register_command_listener():
+    """Register the listener for every MongoClient created from now on"""
+    global _registered
+    with _register_lock:
+        if not _registered:
+            monitoring.register(command_listener)
+            _registered = True
+
+
+def djongo_execute_wrapper(execute, sql, params, many, context):
+    """Time ORM queries and subtract the Mongo share to get translation cost"""
+    trace = _current.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    mongo_before = trace.phases['mongo']
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        trace.phases['djongo'] += max(elapsed - (trace.phases['mongo'] - mongo_before), 0.0)
+
+
+def sample_rate():
+    return getattr(settings, 'PERFORMANCE_SAMPLE_RATE', 0.01)
+
+
+def traced_stream(chunks, trace, finish):
+    """
+    Produce ``chunks`` with ``trace`` current, so the cursor's getMore
+    commands are attributed to the request, and call ``finish`` on close.
+    """
+    iterator = iter(chunks)
+    try:
+        while True:
+            token = _current.set(trace)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        finish()
+
+
+class PerformanceMiddleware:
+    # Async-capable so ASGI requests to the async views are not funnelled
+    # through a sync thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Tells Django's handler that __call__ returns a coroutine
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        register_command_listener()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        if not self.sampled():
+            response = self.get_response(request)
+            self.observe_total(request, time.perf_counter() - start)
+            return response
+
+        trace = RequestTrace()
+        token = _current.set(trace)
+        try:
+            with connection.execute_wrapper(djongo_execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, trace, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        if not self.sampled():
+            response = await self.get_response(request)
+            self.observe_total(request, time.perf_counter() - start)
+            return response
+
+        # Motor runs its I/O in executor threads, which do not inherit the
+        # trace, so async views report Mongo time as part of "app"
+        trace = RequestTrace()
+        token = _current.set(trace)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, trace, start)
+
+    @staticmethod
+    def sampled():
+        rate = sample_rate()
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def finish(self, request, response, trace, start):
+        """Record the trace now, or once a streaming body has been sent"""
+        if not response.streaming:
+            timings = self.record(request, trace, time.perf_counter() - start)
+            response['Server-Timing'] = ', '.join(timings)
+            return response
+
+        def recorded():
+            self.record(request, trace, time.perf_counter() - start)
+        response.streaming_content = traced_stream(response.streaming_content, trace, recorded)
+        return response
+
+    def record(self, request, trace, total):
+        """Aggregate a sampled request; returns its Server-Timing entries"""
+        phases = trace.phases
+        phases['app'] = max(total - sum(phases[p] for p in PHASES if p != 'app'), 0.0)
+        route = self.observe_total(request, total)
+        for phase in PHASES:
+            phase_duration.observe(phases[phase], route, phase)
+        sampled_requests.inc(1, route)
+        mongo_commands.inc(trace.mongo_commands, route)
+        if trace.mongo_bytes_sent is not None:
+            mongo_bytes.inc(trace.mongo_bytes_sent, route)
+        mongo_documents.inc(trace.mongo_documents_received, route)
+
+        timings = [f'{phase};dur={phases[phase] * 1000:.2f}' for phase in PHASES]
+        timings.append(f'total;dur={total * 1000:.2f}')
+        timings.append(f'mongo-commands;desc="{trace.mongo_commands}"')
+        if trace.mongo_bytes_sent is not None:
+            timings.append(f'mongo-bytes-sent;desc="{trace.mongo_bytes_sent}"')
+        timings.append(f'mongo-docs;desc="{trace.mongo_documents_received}"')
+        return timings
+
+    @staticmethod
+    def observe_total(request, duration):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else 'unmatched'
+        request_duration.observe(duration, route, request.method)
+        return route
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of this process' metrics.
+
+    Off unless ``METRICS_TOKEN`` is set, and then only served to requests
+    sending it as ``Authorization: Bearer <token>``.  Client addresses are
+    not trusted: behind a local reverse proxy every client is 127.0.0.1.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.META.get('HTTP_AUTHORIZATION', '')
+    if not token or not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+        raise Http404
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.exposition())
+    for key, value in pool_stats().items():
+        name = f'employees_mongo_pool_{key}'
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
-from pymongo import MongoClient
+from employees.audit import run_audit
+from employees.mongo import get_database
 from pymongo.errors import OperationFailure
 from employees.schemas import EMPLOYEE_SCHEMA, USER_SCHEMA
 
@@ -24,9 +24,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         try:
-            # Connect to MongoDB
-            client = MongoClient(connection.settings_dict['CLIENT']['host'])
-            db = client.get_database(connection.settings_dict['NAME'])
+            # Connect to MongoDB (shared process-wide client)
+            db = get_database()
             
             collection_choice = options['collection']
             validate_existing = options['validate_existing']
@@ -56,7 +55,7 @@ class Command(BaseCommand):
             
             # Validate existing documents if requested
             if validate_existing:
-                self.validate_existing_documents(db[collection_name], EMPLOYEE_SCHEMA, collection_name)
+                self.validate_existing_documents(db[collection_name], 'employees', collection_name)
             
             # Apply schema validation
             validation_action = "warn" if validate_existing else "error"
@@ -94,7 +93,7 @@ class Command(BaseCommand):
             
             # Validate existing documents if requested
             if validate_existing:
-                self.validate_existing_documents(db[collection_name], USER_SCHEMA, collection_name)
+                self.validate_existing_documents(db[collection_name], 'users', collection_name)
             
             # Apply schema validation
             validation_action = "warn" if validate_existing else "error"
@@ -118,12 +117,12 @@ class Command(BaseCommand):
                 self.style.ERROR(f'Failed to apply schema to users: {str(e)}')
             )
 
-    def validate_existing_documents(self, collection, schema, collection_name):
-        """Validate existing documents against the schema"""
+    def validate_existing_documents(self, collection, target, collection_name):
+        """Validate every existing document against the compiled schema"""
         self.stdout.write(f"Validating existing documents in {collection_name}...")
         
         # Count total documents
-        total_docs = collection.count_documents({})
+        total_docs = collection.estimated_document_count()
         
         if total_docs == 0:
             self.stdout.write(
@@ -131,30 +130,21 @@ class Command(BaseCommand):
             )
             return
         
-        # Try to find documents that would fail validation
         try:
-            # This is a simplified validation - MongoDB will do the full validation
-            invalid_count = 0
-            sample_invalid = []
-            
-            for doc in collection.find().limit(100):  # Check first 100 docs
-                # Basic checks that we can do in Python
-                if collection_name == 'employees':
-                    if not self.validate_employee_doc(doc):
-                        invalid_count += 1
-                        if len(sample_invalid) < 3:
-                            sample_invalid.append(doc.get('employee_id', 'Unknown ID'))
-            
-            if invalid_count > 0:
+            # Full parallel scan; see the audit_documents command for options
+            summary = run_audit(target)
+            
+            if summary['invalid'] > 0:
+                rules = ', '.join(f'{rule} ({count})' for rule, count in summary['violations'].items())
                 self.stdout.write(
                     self.style.WARNING(
-                        f'Found {invalid_count} potentially invalid documents in {collection_name}. '
-                        f'Sample IDs: {sample_invalid}'
+                        f"Found {summary['invalid']} invalid documents in {collection_name}. "
+                        f"Violations: {rules}. Run audit_documents --output to list them."
                     )
                 )
             else:
                 self.stdout.write(
-                    self.style.SUCCESS(f'All sampled documents in {collection_name} appear valid.')
+                    self.style.SUCCESS(f"All {summary['scanned']} documents in {collection_name} are valid.")
                 )
                 
         except Exception as e:
@@ -162,27 +152,6 @@ class Command(BaseCommand):
                 self.style.WARNING(f'Could not validate existing documents: {str(e)}')
             )
 
-    def validate_employee_doc(self, doc):
-        """Basic validation for employee document"""
-        required_fields = ['employee_id', 'name', 'department', 'salary', 'joining_date']
-        
-        # Check required fields
-        for field in required_fields:
-            if field not in doc:
-                return False
-        
-        # Check employee_id format
-        employee_id = doc.get('employee_id', '')
-        if not isinstance(employee_id, str) or len(employee_id) != 4 or not employee_id.startswith('E'):
-            return False
-        
-        # Check salary is positive
-        salary = doc.get('salary')
-        if not isinstance(salary, int) or salary < 0:
-            return False
-        
-        return True
-
     def show_schema_info(self, collection, collection_name):
         """Display schema validation info"""
         try:
@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from employees.audit import TARGETS, run_audit
+
+
+class Command(BaseCommand):
+    help = 'Validate every document in a collection against its JSON schema, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--collection',
+            type=str,
+            choices=sorted(TARGETS),
+            default='employees',
+            help='Collection to audit'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Worker processes (1 scans in this process)'
+        )
+        parser.add_argument(
+            '--partitions',
+            type=int,
+            help='Number of _id ranges to split the collection into (default: 4 per worker)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write offending document IDs and the rules they break to this file'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='Record finished partitions here; rerun with the same path to resume'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Documents per cursor batch'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            target = options['collection']
+            self.stdout.write(f"Auditing {TARGETS[target][0]} with {options['workers']} workers...")
+            start = time.perf_counter()
+
+            summary = run_audit(
+                target,
+                workers=options['workers'],
+                partitions=options['partitions'],
+                output=options['output'],
+                checkpoint_path=options['checkpoint'],
+                batch_size=options['batch_size'],
+                progress=self.show_progress,
+            )
+            elapsed = time.perf_counter() - start
+            self.show_summary(summary, elapsed, options['output'])
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error auditing documents: {str(e)}')
+            )
+
+    def show_progress(self, done, total, partition):
+        self.stdout.write(
+            f"Partition {done}/{total}: scanned {partition['scanned']}, "
+            f"invalid {partition['invalid']}"
+        )
+
+    def show_summary(self, summary, elapsed, output):
+        rate = summary['scanned'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"\nScanned {summary['scanned']} documents in {elapsed:.1f}s ({rate:.0f} docs/s)"
+        )
+        if not summary['invalid']:
+            self.stdout.write(self.style.SUCCESS('All documents match the schema'))
+            return
+
+        self.stdout.write(self.style.WARNING(f"{summary['invalid']} invalid documents"))
+        self.stdout.write('Violations per rule:')
+        for rule, count in summary['violations'].items():
+            self.stdout.write(f"  {rule}: {count}")
+        if output:
+            self.stdout.write(f"Offending IDs written to {output}")
@@ -0,0 +1,272 @@
+import io
+import json
+import random
+import statistics
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from pymongo import monitoring
+from rest_framework.test import APIClient
+
+from employees import mongo, salary_stats
+from employees.pagination import LIST_SORT, NEXT, encode_cursor
+from employees.schemas import EMPLOYEE_SCHEMA
+
+SKILLS = [
+    'Python', 'SQL', 'Excel', 'Communication', 'JavaScript', 'Java', 'MongoDB',
+    'Django', 'Docker', 'AWS', 'Kubernetes', 'Go', 'React', 'Negotiation',
+    'Recruiting', 'Accounting', 'Tableau', 'Rust', 'Terraform', 'Figma',
+]
+
+SCENARIOS = ['list_shallow', 'list_uncounted', 'list_deep', 'list_cursor_deep', 'search', 'avg_salary', 'create', 'retrieve']
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """
+    Counts Mongo commands issued for the current request, including those
+    run on the count pool (which executes in a copy of the request context)
+    """
+
+    def __init__(self):
+        self.current = ContextVar('round_trips', default=None)
+
+    @property
+    def count(self):
+        cell = self.current.get()
+        return cell[0] if cell else 0
+
+    def reset(self):
+        # A mutable cell, so copied contexts add to the same total
+        self.current.set([0])
+
+    def started(self, event):
+        cell = self.current.get()
+        if cell is not None:
+            cell[0] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway database and load-test the employee API, reporting JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=10000,
+                            help='Synthetic employees to seed')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Concurrent client threads')
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                            help='Scenario to run (repeatable, default: all)')
+        parser.add_argument('--database', type=str,
+                            help='Throwaway database name (default: <NAME>_benchmark)')
+        parser.add_argument('--in-memory', action='store_true',
+                            help='Use an in-process mongomock stand-in instead of mongod')
+        parser.add_argument('--with-cache', action='store_true',
+                            help='Leave the response cache on (measures cache hits)')
+        parser.add_argument('--keep', action='store_true',
+                            help='Do not drop the throwaway database afterwards')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed for reproducible data and requests')
+        parser.add_argument('--output', type=str,
+                            help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        database = options['database'] or f"{connection.settings_dict['NAME']}_benchmark"
+        if database == connection.settings_dict['NAME']:
+            raise CommandError('Refusing to benchmark against the live database.')
+
+        self.random = random.Random(options['seed'])
+        self.counter = RoundTripCounter()
+
+        mongo.close_client()
+        if options['in_memory']:
+            try:
+                import mongomock
+            except ImportError:
+                raise CommandError('--in-memory needs mongomock (pip install mongomock).')
+            mongo.install_client(mongomock.MongoClient())
+        else:
+            # Clients built from now on report their commands to the counter
+            monitoring.register(self.counter)
+
+        settings_overrides = {
+            'ALLOWED_HOSTS': ['testserver'],
+            'EMPLOYEE_CACHE_ENABLED': options['with_cache'],
+        }
+        try:
+            with override_settings(**settings_overrides), mongo.use_database(database) as db:
+                db.drop_collection('employees')
+                db.drop_collection(salary_stats.STATS_COLLECTION)
+                self.seed(db.employees, options['employees'])
+                call_command('create_indexes', stdout=io.StringIO())
+                salary_stats.rebuild()
+
+                report = {
+                    'config': {
+                        'employees': options['employees'],
+                        'requests': options['requests'],
+                        'concurrency': options['concurrency'],
+                        'page_size': options['page_size'],
+                        'backend': 'mongomock' if options['in_memory'] else 'mongod',
+                        'cache': options['with_cache'],
+                        'seed': options['seed'],
+                    },
+                    'scenarios': {},
+                }
+                for name in options['scenario'] or SCENARIOS:
+                    report['scenarios'][name] = self.run_scenario(
+                        name, db.employees, options['requests'], options['concurrency'],
+                        options['page_size'], options['in_memory'])
+
+                if not options['keep']:
+                    mongo.get_client().drop_database(database)
+        finally:
+            mongo.close_client()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def seed(self, collection, count):
+        """Insert ``count`` synthetic employees in batches"""
+        departments = EMPLOYEE_SCHEMA['$jsonSchema']['properties']['department']['enum']
+        # Zipf-like popularity: a few skills are very common, most are rare
+        weights = [1.0 / (rank + 1) for rank in range(len(SKILLS))]
+        start = datetime(2010, 1, 1)
+
+        batch = []
+        for i in range(count):
+            batch.append({
+                'employee_id': f'E{i:06d}',
+                'name': ' '.join(self.random_word() for _ in range(2)),
+                'department': self.random.choice(departments),
+                'salary': int(min(max(self.random.lognormvariate(11, 0.4), 20000), 1000000)),
+                'joining_date': start + timedelta(days=self.random.randrange(5000)),
+                'skills': sorted(set(self.random.choices(SKILLS, weights, k=self.random.randint(1, 6)))),
+            })
+            if len(batch) == 1000:
+                collection.insert_many(batch)
+                batch = []
+        if batch:
+            collection.insert_many(batch)
+        # retrieve draws from these IDs; the collection count also includes
+        # the rows the create scenario added
+        self.seeded = count
+        self.stderr.write(f'Seeded {count} employees')
+
+    def random_word(self):
+        return self.random.choice(string.ascii_uppercase) + ''.join(
+            self.random.choices(string.ascii_lowercase, k=self.random.randint(3, 8)))
+
+    def make_requests(self, name, collection, total, page_size):
+        """Build the (method, path, body) list for a scenario up front"""
+        count = collection.count_documents({})
+        last_page = max((count + page_size - 1) // page_size, 1)
+        if name == 'list_cursor_deep':
+            # Token pointing at the same depth as list_deep
+            doc = next(collection.find().sort(LIST_SORT).skip(max(count - page_size - 1, 0)).limit(1))
+            token = encode_cursor(doc, NEXT)
+
+        requests = []
+        for i in range(total):
+            if name == 'list_shallow':
+                requests.append(('get', f'/api/employees/?page=1&page_size={page_size}', None))
+            elif name == 'list_uncounted':
+                requests.append(('get', f'/api/employees/?page=1&page_size={page_size}&count=none', None))
+            elif name == 'list_deep':
+                requests.append(('get', f'/api/employees/?page={last_page}&page_size={page_size}', None))
+            elif name == 'list_cursor_deep':
+                requests.append(('get', f'/api/employees/?cursor={token}&page_size={page_size}', None))
+            elif name == 'search':
+                skill = self.random.choice(SKILLS)
+                requests.append(('get', f'/api/employees/search/?skill={skill}&page_size={page_size}', None))
+            elif name == 'avg_salary':
+                requests.append(('get', '/api/employees/avg-salary/', None))
+            elif name == 'create':
+                # The schema only admits E000-E999 (seeded IDs use 6 digits, so
+                # these never collide with them); past 1000 requests the extra
+                # creates measure duplicate rejection instead
+                employee_id = f'E{i % 1000:03d}'
+                requests.append(('post', '/api/employees/', {
+                    'employee_id': employee_id,
+                    'name': 'Bench Hire',
+                    'department': 'Engineering',
+                    'salary': 50000 + i,
+                    'joining_date': '2024-01-01',
+                    'skills': ['Python'],
+                }))
+            elif name == 'retrieve':
+                employee_id = f'E{self.random.randrange(self.seeded):06d}'
+                requests.append(('get', f'/api/employees/{employee_id}/', None))
+        return requests
+
+    def run_scenario(self, name, collection, total, concurrency, page_size, in_memory):
+        requests = self.make_requests(name, collection, total, page_size)
+        user = User(id=0, username='benchmark')
+        local = threading.local()
+
+        def send(request):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = APIClient()
+                client.force_authenticate(user=user)
+            method, path, body = request
+            self.counter.reset()
+            start = time.perf_counter()
+            if body is None:
+                response = getattr(client, method)(path)
+            else:
+                response = getattr(client, method)(path, body, format='json')
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - start) * 1000
+            return elapsed, response.status_code < 400, self.counter.count
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, requests))
+        wall = time.perf_counter() - start
+
+        latencies = sorted(elapsed for elapsed, _, _ in results)
+        round_trips = [trips for _, _, trips in results]
+        self.stderr.write(f'{name}: {len(results)} requests in {wall:.2f}s')
+        return {
+            'requests': len(results),
+            'errors': sum(1 for _, ok, _ in results if not ok),
+            'throughput_rps': round(len(results) / wall, 2),
+            'latency_ms': {
+                'mean': round(statistics.mean(latencies), 3),
+                'p50': round(self.percentile(latencies, 50), 3),
+                'p95': round(self.percentile(latencies, 95), 3),
+                'p99': round(self.percentile(latencies, 99), 3),
+                'max': round(latencies[-1], 3),
+            },
+            # mongomock does not emit command events
+            'mongo_round_trips_per_request': None if in_memory else round(statistics.mean(round_trips), 2),
+        }
+
+    @staticmethod
+    def percentile(values, percent):
+        """Nearest-rank percentile of already sorted values"""
+        index = max(int(round(percent / 100.0 * len(values))) - 1, 0)
+        return values[min(index, len(values) - 1)]
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from employees.models import Employee
+from employees.repository import EmployeeRepository
+
+
+class Command(BaseCommand):
+    help = 'Compare single-employee lookup latency: Djongo ORM vs the PyMongo repository'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1000,
+            help='Lookups per path'
+        )
+        parser.add_argument(
+            '--employee-id',
+            type=str,
+            help='Employee to look up (defaults to any existing employee)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            repository = EmployeeRepository()
+            employee_id = options['employee_id']
+            if not employee_id:
+                doc = repository.collection.find_one({}, {'employee_id': 1})
+                if doc is None:
+                    self.stdout.write(
+                        self.style.WARNING('No employees found, nothing to benchmark.')
+                    )
+                    return
+                employee_id = doc['employee_id']
+
+            iterations = options['iterations']
+            self.stdout.write(f"Looking up {employee_id} {iterations} times per path...")
+
+            orm = self.measure(lambda: Employee.objects.get(employee_id=employee_id), iterations)
+            native = self.measure(lambda: repository.get(employee_id), iterations)
+
+            self.report('Djongo ORM', orm)
+            self.report('PyMongo repository', native)
+
+            delta = statistics.mean(orm) - statistics.mean(native)
+            speedup = statistics.mean(orm) / statistics.mean(native)
+            self.stdout.write(
+                self.style.SUCCESS(f"Repository saves {delta:.3f} ms per lookup ({speedup:.1f}x faster)")
+            )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error running benchmark: {str(e)}')
+            )
+
+    def measure(self, lookup, iterations):
+        """Latencies in milliseconds, after a short warm-up"""
+        for _ in range(min(iterations, 20)):
+            lookup()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            lookup()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+        self.stdout.write(
+            f"- {label}: mean={statistics.mean(timings):.3f} ms "
+            f"p50={statistics.median(timings):.3f} ms p95={p95:.3f} ms"
+        )
@@ -0,0 +1,102 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from employees.schemas import EMPLOYEE_SCHEMA, EMPLOYEE_VALIDATOR
+from employees.serializers import EmployeeWriteSerializer
+
+
+class Command(BaseCommand):
+    help = 'Measure validation throughput: compiled schema validator vs the DRF serializer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--documents',
+            type=int,
+            default=100000,
+            help='Synthetic documents to validate with the compiled validator'
+        )
+        parser.add_argument(
+            '--serializer-sample',
+            type=int,
+            default=2000,
+            help='Documents to run through EmployeeWriteSerializer (it is much slower)'
+        )
+        parser.add_argument(
+            '--invalid-ratio',
+            type=float,
+            default=0.1,
+            help='Fraction of documents that break at least one rule'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            rng = random.Random(options['seed'])
+            documents = [
+                self.make_document(rng, i, rng.random() < options['invalid_ratio'])
+                for i in range(options['documents'])
+            ]
+            self.stdout.write(f"Validating {len(documents)} documents...")
+
+            start = time.perf_counter()
+            invalid = sum(1 for doc in documents if EMPLOYEE_VALIDATOR.violations(doc))
+            compiled = time.perf_counter() - start
+            self.report('Compiled validator', len(documents), compiled)
+            self.stdout.write(f"  {invalid} documents rejected")
+
+            sample = documents[:options['serializer_sample']]
+            if sample:
+                payloads = [self.as_payload(doc) for doc in sample]
+                start = time.perf_counter()
+                for payload in payloads:
+                    EmployeeWriteSerializer(data=payload).is_valid()
+                drf = time.perf_counter() - start
+                self.report('EmployeeWriteSerializer', len(sample), drf)
+
+                speedup = (drf / len(sample)) / (compiled / len(documents))
+                self.stdout.write(
+                    self.style.SUCCESS(f"Compiled validator is {speedup:.0f}x faster per document")
+                )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error running benchmark: {str(e)}')
+            )
+
+    def make_document(self, rng, i, invalid):
+        departments = EMPLOYEE_SCHEMA['$jsonSchema']['properties']['department']['enum']
+        doc = {
+            'employee_id': f'E{i % 1000:03d}',
+            'name': f'Employee {i}',
+            'department': rng.choice(departments),
+            'salary': rng.randint(20000, 200000),
+            'joining_date': datetime(2015, 1, 1) + timedelta(days=rng.randrange(3000)),
+            'skills': rng.sample(['Python', 'SQL', 'Go', 'Django', 'MongoDB', 'AWS'], rng.randint(1, 4)),
+        }
+        if invalid:
+            breakage = rng.randrange(4)
+            if breakage == 0:
+                doc['employee_id'] = f'X{i}'
+            elif breakage == 1:
+                doc['department'] = 'Legal'
+            elif breakage == 2:
+                doc['salary'] = -doc['salary']
+            else:
+                doc['skills'] = ['Python', 'Python']
+        return doc
+
+    @staticmethod
+    def as_payload(doc):
+        """The same document as a JSON request body"""
+        payload = dict(doc)
+        payload['joining_date'] = doc['joining_date'].date().isoformat()
+        return payload
+
+    def report(self, label, count, elapsed):
+        rate = count / elapsed if elapsed else float('inf')
+        self.stdout.write(
+            f"- {label}: {count} docs in {elapsed * 1000:.1f} ms "
+            f"({rate:,.0f} docs/s, {elapsed / count * 1e6:.2f} us/doc)"
+        )
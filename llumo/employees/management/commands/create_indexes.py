@@ -1,54 +1,96 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
-from pymongo import MongoClient
+from employees.indexes import INDEX_SPEC, advise, diff_indexes
+from employees.mongo import get_database
 
 
 class Command(BaseCommand):
     help = 'Create MongoDB indexes for better performance'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which indexes would be created or dropped without changing anything'
+        )
+        parser.add_argument(
+            '--keep-obsolete',
+            action='store_true',
+            help='Do not drop indexes that are no longer in the index spec'
+        )
+        parser.add_argument(
+            '--advise',
+            action='store_true',
+            help='Explain the queries the views issue and flag COLLSCAN, in-memory SORT '
+                 'and high docsExamined/nReturned ratios'
+        )
+
     def handle(self, *args, **options):
         try:
-            # Connect to MongoDB
-            client = MongoClient(connection.settings_dict['CLIENT']['host'])
-            db = client.get_database(connection.settings_dict['NAME'])
+            # Connect to MongoDB (shared process-wide client)
+            db = get_database()
             collection = db.employees
-            
-            # Create index on employee_id
-            collection.create_index("employee_id", unique=True)
-            self.stdout.write(
-                self.style.SUCCESS('Successfully created unique index on employee_id')
-            )
-            
-            # Create index on department for better filtering performance
-            collection.create_index("department")
-            self.stdout.write(
-                self.style.SUCCESS('Successfully created index on department')
-            )
-            
-            # Create index on joining_date for better sorting performance
-            collection.create_index("joining_date")
-            self.stdout.write(
-                self.style.SUCCESS('Successfully created index on joining_date')
-            )
-            
-            # Create index on skills for better search performance
-            collection.create_index("skills")
-            self.stdout.write(
-                self.style.SUCCESS('Successfully created index on skills')
-            )
-            
+
+            if options['advise']:
+                self.show_advice(collection)
+                return
+
+            missing, obsolete, kept = diff_indexes(collection, INDEX_SPEC)
+            dry_run = options['dry_run']
+
+            for name in kept:
+                self.stdout.write(f"Index {name} is up to date")
+
+            for entry in missing:
+                keys = ', '.join(f"{field} {direction}" for field, direction in entry['keys'])
+                if dry_run:
+                    self.stdout.write(f"Would create index on ({keys})")
+                    continue
+                name = collection.create_index(
+                    entry['keys'], unique=entry.get('unique', False), background=True
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(f'Successfully created index {name} on ({keys})')
+                )
+
+            if not options['keep_obsolete']:
+                for name in obsolete:
+                    if dry_run:
+                        self.stdout.write(f"Would drop obsolete index {name}")
+                        continue
+                    collection.drop_index(name)
+                    self.stdout.write(
+                        self.style.WARNING(f'Dropped obsolete index {name}')
+                    )
+
+            if not missing and (not obsolete or options['keep_obsolete']):
+                self.stdout.write(self.style.SUCCESS('Indexes already match the index spec'))
+
             # List all indexes
             indexes = list(collection.list_indexes())
             self.stdout.write(f"\nCurrent indexes on employees collection:")
             for index in indexes:
                 self.stdout.write(f"- {index['name']}: {index.get('key', {})}")
-                
+
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Error creating indexes: {str(e)}')
             )
 
+    def show_advice(self, collection):
+        """Print explain() findings for every view query"""
+        problems = 0
+        for finding in advise(collection):
+            stages = ' <- '.join(finding['stages'])
+            self.stdout.write(f"\n{finding['query']}: {finding['filter']}")
+            self.stdout.write(f"  Plan: {stages}")
+            self.stdout.write(
+                f"  Docs examined: {finding['docs_examined']}, returned: {finding['returned']}"
+            )
+            for warning in finding['warnings']:
+                problems += 1
+                self.stdout.write(self.style.WARNING(f"  ! {warning}"))
 
-
-
-            
\ No newline at end of file
+        if problems:
+            self.stdout.write(self.style.WARNING(f'\n{problems} potential problems found'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nAll view queries use indexes efficiently'))
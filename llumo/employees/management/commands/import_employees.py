@@ -0,0 +1,108 @@
+import io
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from employees.bulk import BATCH_SIZE
+from employees.importer import CHUNK_SIZE, FORMATS, detect_format, run_import
+
+
+class Command(BaseCommand):
+    help = 'Stream employees from a CSV or NDJSON file (or stdin) into MongoDB in validated batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            type=str,
+            help='File to import, or - for stdin'
+        )
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=FORMATS,
+            help='Input format (default: from the file extension; required for stdin)'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Update employees that already exist instead of rejecting them as duplicates'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Threads validating and writing chunks'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Rows validated and committed to the checkpoint together'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Documents per bulk_write call'
+        )
+        parser.add_argument(
+            '--rejects',
+            type=str,
+            help='Write rejected rows and their errors to this file (NDJSON)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='Record imported rows here; rerun with the same path to resume'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            source = options['source']
+            fmt = options['format'] or detect_format(source)
+            start = time.perf_counter()
+
+            if source == '-':
+                stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+            else:
+                stream = open(source, encoding='utf-8-sig', newline='')
+            with stream:
+                result = run_import(
+                    stream, fmt, source,
+                    upsert=options['upsert'],
+                    workers=options['workers'],
+                    chunk_size=options['chunk_size'],
+                    batch_size=options['batch_size'],
+                    rejects_path=options['rejects'],
+                    checkpoint_path=options['checkpoint'],
+                    progress=self.show_progress,
+                )
+            self.show_summary(result, time.perf_counter() - start, options['rejects'])
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error importing employees: {str(e)}')
+            )
+
+    def show_progress(self, rows_done, counts):
+        written = counts['created'] + counts['updated']
+        self.stdout.write(f"Row {rows_done}: {written} written, {rows_done - written} rejected")
+
+    def show_summary(self, result, elapsed, rejects):
+        counts = result['counts']
+        rows = result['rows'] - result['resumed_at']
+        rate = rows / elapsed if elapsed else 0
+        if result['resumed_at']:
+            self.stdout.write(f"\nResumed after row {result['resumed_at']}")
+        self.stdout.write(f"\nProcessed {rows} rows in {elapsed:.1f}s ({rate:.0f} rows/s)")
+        for outcome in ('created', 'updated', 'invalid', 'duplicate', 'error'):
+            if counts.get(outcome):
+                self.stdout.write(f"  {outcome}: {counts[outcome]}")
+
+        rejected = result['rows'] - counts.get('created', 0) - counts.get('updated', 0)
+        if not rejected:
+            self.stdout.write(self.style.SUCCESS('All rows imported'))
+        elif rejects:
+            self.stdout.write(self.style.WARNING(f"{rejected} rows rejected, see {rejects}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{rejected} rows rejected"))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from employees import salary_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized per-department salary aggregates and report drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift against the live $group result, do not rebuild'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            differences = salary_stats.drift()
+
+            if differences:
+                self.stdout.write(
+                    self.style.WARNING(f'Found {len(differences)} drifted values:')
+                )
+                for department, field, stored, live in differences:
+                    self.stdout.write(f"  {department}.{field}: materialized={stored} live={live}")
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS('Materialized salary aggregates match the live $group result')
+                )
+
+            if options['check']:
+                return
+
+            stats = salary_stats.rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(f'Rebuilt salary aggregates for {len(stats)} departments')
+            )
+            for department, doc in sorted(stats.items(), key=lambda item: str(item[0])):
+                self.stdout.write(
+                    f"- {department}: count={doc['count']} sum={doc['sum']} "
+                    f"min={doc['min']} max={doc['max']}"
+                )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error rebuilding salary aggregates: {str(e)}')
+            )
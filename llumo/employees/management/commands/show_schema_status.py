@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
-from pymongo import MongoClient
+from employees.mongo import get_database
 import json
 
 
@@ -9,9 +8,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         try:
-            # Connect to MongoDB
-            client = MongoClient(connection.settings_dict['CLIENT']['host'])
-            db = client.get_database(connection.settings_dict['NAME'])
+            # Connect to MongoDB (shared process-wide client)
+            db = get_database()
             
             self.stdout.write("MongoDB Schema Validation Status")
             self.stdout.write("=" * 50)
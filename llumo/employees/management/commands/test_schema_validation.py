@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
-from pymongo import MongoClient
+from employees.mongo import get_database
 from pymongo.errors import WriteError
 import json
 
@@ -19,9 +18,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         try:
-            # Connect to MongoDB
-            client = MongoClient(connection.settings_dict['CLIENT']['host'])
-            db = client.get_database(connection.settings_dict['NAME'])
+            # Connect to MongoDB (shared process-wide client)
+            db = get_database()
             
             collection_choice = options['collection']
             
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from employees.watcher import ChangeWatcher
+
+
+class Command(BaseCommand):
+    help = ('Follow the employees change stream and refresh derived data (salary aggregates, '
+            'caches, skill index) for writes made outside the API')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--name',
+            type=str,
+            default='watch_employees',
+            help='Key of the persisted resume token in employee_watcher_state'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Seconds to wait for events, or between polls (default: EMPLOYEE_WATCHER_INTERVAL)'
+        )
+        parser.add_argument(
+            '--poll',
+            action='store_true',
+            help='Poll the write version instead of opening a change stream'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Discard the persisted resume token and start from now'
+        )
+
+    def handle(self, *args, **options):
+        watcher = ChangeWatcher(options['name'], options['interval'], options['poll'])
+        try:
+            if options['reset']:
+                watcher.reset()
+                self.stdout.write(self.style.WARNING(f"Discarded the resume token of {options['name']}"))
+
+            self.stdout.write(f"Watching employees as {options['name']} (Ctrl+C to stop)...")
+            watcher.run()
+
+        except KeyboardInterrupt:
+            watcher.stop()
+            self.stdout.write(
+                self.style.SUCCESS(f'Stopped ({watcher.mode}) after {watcher.published} refreshes')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error watching employees: {str(e)}')
+            )
@@ -0,0 +1,228 @@
+"""
+Shared, process-wide MongoDB client for the views and management commands.
+
+Djongo keeps its own client for the ORM, but the views and commands talk to
+PyMongo directly.  Building a ``MongoClient`` per request pays for server
+discovery and a new monitor thread every time, so everything goes through
+the lazily created client below instead.
+
+The client is configured from ``settings.DATABASES['default']['CLIENT']``;
+any extra keys next to ``host`` (``maxPoolSize``, ``waitQueueTimeoutMS``,
+``socketTimeoutMS`` ...) are passed straight to ``MongoClient``.
+
+The async views use Motor instead, an optional dependency, with one client
+per event loop (see ``get_async_client()``).
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from pymongo import MongoClient, monitoring
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # Only the async views need motor
+    AsyncIOMotorClient = None
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Keeps running totals of connection pool events for ``pool_stats()``"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.waiters = 0
+            self.checkout_failures = 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checked_out': self.checked_out,
+                'waiters': self.waiters,
+                'created': self.created,
+                'closed': self.closed,
+                'open': self.created - self.closed,
+                'checkout_failures': self.checkout_failures,
+            }
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiters += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiters -= 1
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiters -= 1
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    # Pool level events are not needed for the counters above
+    def pool_created(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_metrics = PoolMetricsListener()
+
+_client = None
+_client_pid = None
+_database_name = None
+_lock = threading.Lock()
+
+# Event loop -> Motor client; entries go away with their loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def client_options():
+    """MongoClient keyword arguments taken from the default database settings"""
+    options = dict(connection.settings_dict.get('CLIENT') or {})
+    options.pop('host', None)
+    return options
+
+
+def get_client():
+    """
+    Return the process-wide MongoClient, creating it on first use.
+
+    A MongoClient must not be shared across ``fork()``, so a client inherited
+    from a parent process (gunicorn pre-fork, multiprocessing) is discarded
+    and a fresh one is built for the child.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != pid:
+            if _client_pid != pid:
+                # Counters from the parent process do not describe our pool
+                pool_metrics.reset()
+            options = client_options()
+            listeners = list(options.pop('event_listeners', []))
+            listeners.append(pool_metrics)
+            _client = MongoClient(
+                connection.settings_dict['CLIENT']['host'],
+                connect=False,
+                event_listeners=listeners,
+                **options
+            )
+            _client_pid = pid
+    return _client
+
+
+def get_database():
+    """Return the database configured for the default connection"""
+    return get_client().get_database(_database_name or connection.settings_dict['NAME'])
+
+
+def get_collection(name='employees'):
+    """Return a collection from the configured database"""
+    return get_database()[name]
+
+
+def get_async_client():
+    """
+    Return the Motor client for the running event loop, creating it on first use.
+
+    A Motor client is bound to the loop it was created on, so each loop (one
+    per uvicorn worker) gets its own, with the same pool options as
+    ``get_client()``.  Loops that only live for one call, as under WSGI, would
+    each build a client: ``async_views`` does not come here outside ASGI.
+    """
+    if AsyncIOMotorClient is None:
+        raise ImproperlyConfigured('The async employee endpoints require motor (pip install motor).')
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncIOMotorClient(
+            connection.settings_dict['CLIENT']['host'],
+            io_loop=loop,
+            **client_options()
+        )
+    return client
+
+
+def get_async_collection(name='employees'):
+    """Return a Motor collection from the configured database"""
+    database = get_async_client().get_database(_database_name or connection.settings_dict['NAME'])
+    return database[name]
+
+
+def close_client():
+    """Close the shared client; the next ``get_client()`` call reconnects"""
+    global _client, _client_pid
+
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def install_client(client):
+    """
+    Use ``client`` as the shared client for this process.
+
+    Lets tools run against an in-process stand-in (e.g. mongomock) instead of
+    a real server.
+    """
+    global _client, _client_pid
+
+    with _lock:
+        _client = client
+        _client_pid = os.getpid()
+
+
+@contextmanager
+def use_database(name):
+    """Point ``get_database()`` at another database, e.g. a throwaway one"""
+    global _database_name
+
+    previous = _database_name
+    _database_name = name
+    try:
+        yield get_database()
+    finally:
+        _database_name = previous
+
+
+def pool_stats():
+    """Connection pool counters for the shared client"""
+    return pool_metrics.snapshot()
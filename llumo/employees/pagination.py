@@ -0,0 +1,349 @@
+"""
+Keyset (cursor based) pagination for the employee list endpoint.
+
+Offset pagination (``page=``) has to walk past every skipped document, so
+deep pages get linearly slower.  Cursor pagination instead remembers the
+sort key of the last row it returned, ``(joining_date, employee_id)``, and
+seeks straight to it with a range predicate that the compound
+``(department, joining_date, employee_id)`` index can answer.
+"""
+
+import base64
+import contextvars
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bson import json_util
+from django.conf import settings
+
+from . import caching, salary_stats
+
+# Newest joiners first; employee_id breaks ties so the order is total
+LIST_SORT = [('joining_date', -1), ('employee_id', -1)]
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+# ?count= modes for page-number pagination
+EXACT = 'exact'
+ESTIMATED = 'estimated'
+NONE = 'none'
+COUNT_MODES = (EXACT, ESTIMATED, NONE)
+
+# Largest page_size any endpoint serves; query returns its page inside one
+# $facet document, which is capped at 16MB
+MAX_PAGE_SIZE = 1000
+
+_count_executor = None
+_count_slots = None
+_count_executor_lock = threading.Lock()
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class InvalidPage(ValueError):
+    pass
+
+
+def parse_page(params):
+    """``(page, page_size)`` from the query parameters; raises ``InvalidPage``"""
+    try:
+        page = int(params.get('page') or 1)
+        page_size = int(params.get('page_size') or 10)
+    except ValueError:
+        raise InvalidPage('page and page_size must be integers.')
+    if page < 1 or page_size < 1:
+        raise InvalidPage('page and page_size must be positive.')
+    if page_size > MAX_PAGE_SIZE:
+        raise InvalidPage(f'page_size must be at most {MAX_PAGE_SIZE}.')
+    return page, page_size
+
+
+def encode_cursor(doc, direction):
+    """Build an opaque token pointing just past ``doc`` in ``direction``"""
+    payload = json_util.dumps({
+        'd': direction,
+        'j': doc.get('joining_date'),
+        'e': doc.get('employee_id'),
+    })
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(direction, joining_date, employee_id)`` for a token"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction = payload['d']
+        joining_date = payload['j']
+        employee_id = payload['e']
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor.')
+    if direction not in (NEXT, PREVIOUS) or not isinstance(employee_id, str):
+        raise InvalidCursor('Invalid cursor.')
+    return direction, joining_date, employee_id
+
+
+def seek_predicate(joining_date, employee_id, direction):
+    """
+    Range predicate selecting the rows after (``NEXT``) or before
+    (``PREVIOUS``) the given sort key in ``LIST_SORT`` order.
+    """
+    op = '$lt' if direction == NEXT else '$gt'
+    clauses = [
+        {'joining_date': {op: joining_date}},
+        {'joining_date': joining_date, 'employee_id': {op: employee_id}},
+    ]
+    # The schema allows joining_date as a date or a string.  Range operators
+    # only match values of the same BSON type, and strings sort before dates,
+    # so the type boundary has to be crossed explicitly.
+    if isinstance(joining_date, datetime) and direction == NEXT:
+        clauses.append({'joining_date': {'$type': 'string'}})
+    elif isinstance(joining_date, str) and direction == PREVIOUS:
+        clauses.append({'joining_date': {'$type': 'date'}})
+    return {'$or': clauses}
+
+
+def cursor_page(collection, query, page_size, token=None, projection=None):
+    """
+    Fetch one page in cursor mode.
+
+    Returns ``(documents, pagination)`` where ``pagination`` carries the
+    ``next``/``previous`` tokens.  One extra row is fetched to find out
+    whether there is anything beyond this page, so no count is needed.
+    """
+    plan = cursor_plan(query, token, projection)
+    documents = list(collection.find(plan.query, plan.projection)
+                     .sort(plan.sort)
+                     .limit(page_size + 1))
+    return plan.page(documents, page_size)
+
+
+class CursorPlan:
+    """
+    The find() arguments for one cursor page and how to turn the rows into
+    a page.  Kept separate from the query so the async views can share it.
+    """
+
+    def __init__(self, query, sort, projection, requested, direction, seek):
+        self.query = query
+        self.sort = sort
+        self.projection = projection
+        self.requested = requested
+        self.direction = direction
+        self.seek = seek
+
+    def page(self, documents, page_size):
+        """``(documents, pagination)`` from up to ``page_size + 1`` fetched rows"""
+        has_more = len(documents) > page_size
+        documents = documents[:page_size]
+        if self.direction == PREVIOUS:
+            documents.reverse()
+
+        if self.direction == NEXT:
+            has_next, has_previous = has_more, self.seek is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        pagination = {
+            'page_size': page_size,
+            'has_next': has_next and bool(documents),
+            'has_previous': has_previous and bool(documents),
+            'next': encode_cursor(documents[-1], NEXT) if has_next and documents else None,
+            'previous': encode_cursor(documents[0], PREVIOUS) if has_previous and documents else None,
+        }
+        if self.requested is not None:
+            for field in ('joining_date', 'employee_id'):
+                if field not in self.requested:
+                    for doc in documents:
+                        doc.pop(field, None)
+        return documents, pagination
+
+
+def cursor_plan(query, token=None, projection=None):
+    """Build the ``CursorPlan`` for ``query``; raises ``InvalidCursor``"""
+    requested = projection
+    if projection is not None:
+        # The sort key is needed to build the tokens even if not requested
+        projection = dict(projection, joining_date=1, employee_id=1)
+
+    direction, seek = NEXT, None
+    if token:
+        direction, joining_date, employee_id = decode_cursor(token)
+        seek = seek_predicate(joining_date, employee_id, direction)
+
+    find_query = {'$and': [query, seek]} if seek else query
+    sort = LIST_SORT
+    if direction == PREVIOUS:
+        # Walk backwards from the cursor, then restore the display order
+        sort = [(field, -order) for field, order in LIST_SORT]
+    return CursorPlan(find_query, sort, projection, requested, direction, seek)
+
+
+def offset_page(collection, query, page, page_size, projection=None, count=EXACT):
+    """
+    Fetch one page with skip/limit.
+
+    Returns ``(documents, pagination)``.  ``documents`` is lazy so callers
+    can either materialise it or stream it; ``pagination`` is a callable to
+    evaluate once the documents have been read, because the total is
+    fetched alongside them:
+
+    - ``exact``: ``count_documents`` runs on a background thread while the
+      page is fetched, so the two round trips overlap (inline after the
+      fetch when every pool thread is busy).  (A single ``$facet``
+      aggregation would save the second command, but its count branch has to
+      push every matching document through the pipeline.)
+    - ``estimated``: see ``estimate_count()``
+    - ``none``: no count; one extra row tells whether there is a next page
+    """
+    # Calculate skip value for pagination
+    skip = (page - 1) * page_size
+
+    if count == EXACT:
+        total = submit_count(collection, query)
+    elif count == ESTIMATED:
+        total = estimate_count(collection, query)
+
+    # Get paginated employees
+    limit = page_size + 1 if count == NONE else page_size
+    documents = (collection.find(query, projection)
+                 .sort(LIST_SORT)
+                 .skip(skip)
+                 .limit(limit)
+                 .batch_size(limit))
+    if count == EXACT:
+        # The cursor is lazy: a failed fetch surfaces while it is read
+        documents = cancel_on_error(documents, total)
+
+    if count == NONE:
+        seen = []
+
+        def first_page(cursor):
+            for doc in cursor:
+                seen.append(doc)
+                if len(seen) > page_size:
+                    return
+                yield doc
+
+        return first_page(documents), lambda: uncounted_pagination(page, page_size, len(seen) > page_size)
+
+    def pagination():
+        total_count = total.result() if count == EXACT else total
+        metadata = offset_pagination(total_count, page, page_size)
+        if count == ESTIMATED:
+            metadata['total_count_estimated'] = True
+        return metadata
+    return documents, pagination
+
+
+def cancel_on_error(documents, total):
+    """Yield ``documents``, cancelling the ``total`` count if reading them fails"""
+    try:
+        yield from documents
+    except Exception:
+        total.cancel()
+        raise
+
+
+def uncounted_pagination(page, page_size, has_next):
+    """Pagination metadata for ?count=none"""
+    return {
+        'current_page': page,
+        'page_size': page_size,
+        'total_count': None,
+        'total_pages': None,
+        'has_next': has_next,
+        'has_previous': page > 1
+    }
+
+
+def estimate_count(collection, query):
+    """
+    A cheap approximate total for ``query``.
+
+    The unfiltered total comes from collection metadata
+    (``estimated_document_count``) and a department total from the
+    materialized salary aggregates; anything else falls back to the cached
+    exact count.
+    """
+    if not query:
+        return collection.estimated_document_count()
+    if set(query) == {'department'} and isinstance(query['department'], str):
+        stats = salary_stats.read_stats().get(query['department'])
+        return stats['count'] if stats else 0
+    return cached_count(collection, query)
+
+
+def count_executor():
+    """Shared pool that runs count_documents next to the page fetch"""
+    global _count_executor, _count_slots
+
+    if _count_executor is None:
+        with _count_executor_lock:
+            if _count_executor is None:
+                workers = getattr(settings, 'EMPLOYEE_COUNT_WORKERS', 8)
+                _count_slots = threading.BoundedSemaphore(workers)
+                _count_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='employee-count')
+    return _count_executor
+
+
+class InlineCount:
+    """Future-like count run by the request thread itself when asked for"""
+
+    def __init__(self, collection, query):
+        self.collection = collection
+        self.query = query
+
+    def result(self):
+        return self.collection.count_documents(self.query)
+
+    def cancel(self):
+        return True
+
+
+def submit_count(collection, query):
+    """
+    Start ``count_documents`` on the pool, or return an ``InlineCount`` when
+    every pool thread is taken: queueing behind other requests' counts would
+    be slower than counting after the page fetch.
+    """
+    executor = count_executor()
+    if not _count_slots.acquire(blocking=False):
+        return InlineCount(collection, query)
+    # Run in a copy of the request context so tracing still sees the count
+    future = executor.submit(contextvars.copy_context().run, collection.count_documents, query)
+    future.add_done_callback(lambda _: _count_slots.release())
+    return future
+
+
+def offset_pagination(total_count, page, page_size):
+    """Pagination metadata for page-number pagination"""
+    total_pages = (total_count + page_size - 1) // page_size
+    return {
+        'current_page': page,
+        'page_size': page_size,
+        'total_count': total_count,
+        'total_pages': total_pages,
+        'has_next': page < total_pages,
+        'has_previous': page > 1
+    }
+
+
+def cached_count(collection, query):
+    """
+    ``count_documents`` result cached for ``EMPLOYEE_COUNT_CACHE_TTL`` seconds,
+    keyed on the filter and the write generation so writes invalidate it.
+    """
+    digest = hashlib.md5(json_util.dumps(query, sort_keys=True).encode()).hexdigest()
+    key = f'employees:count:{caching.generation()}:{digest}'
+    cache = caching.get_cache()
+    total_count = cache.get(key)
+    if total_count is None:
+        total_count = collection.count_documents(query)
+        cache.set(key, total_count, getattr(settings, 'EMPLOYEE_COUNT_CACHE_TTL', 60))
+    return total_count
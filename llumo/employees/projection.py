@@ -0,0 +1,48 @@
+"""
+``fields=`` query parameter handling (sparse fieldsets).
+
+The requested fields are turned into a Mongo projection so that unneeded
+fields never leave the server.
+"""
+
+from .models import Employee
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def employee_fields():
+    return [field.name for field in Employee._meta.get_fields()]
+
+
+def parse_fields(value):
+    """
+    Turn ``"employee_id,name"`` into a projection dict.
+
+    Returns None when no fields were requested (full documents).
+    """
+    if not value:
+        return None
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+    allowed = employee_fields()
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise InvalidFields(
+            f"Unknown field(s): {', '.join(unknown)}. Allowed fields: {', '.join(allowed)}."
+        )
+    if not fields:
+        return None
+    projection = {name: 1 for name in fields}
+    # _id is always returned unless excluded explicitly
+    projection['_id'] = 0
+    return projection
+
+
+def projected_fields(projection):
+    """Field names kept by a ``parse_fields`` projection, in request order"""
+    return [name for name, include in projection.items() if include]
@@ -0,0 +1,956 @@
+"""
+In-memory read replica of the employees collection (opt-in).
+
+With ``EMPLOYEE_REPLICA_ENABLED`` each process loads the collection with one
+cursor pass into a ``Snapshot`` of array-backed columns, and ``list``,
+``search``, ``retrieve`` and ``avg-salary`` are answered from it without a
+round trip.  MongoDB stays the source of truth:
+
+- A write made through this process (``employees_changed``) re-reads the
+  written employees from Mongo and lays them over the snapshot in a new
+  ``View``: their snapshot rows are skipped and the current documents
+  slotted in at their sort position, so the process reads its own writes
+  without reloading.  Writes too large to list (an import) send requests
+  to Mongo until a reload has finished.
+- The change watcher, when it runs, delivers other processes' writes the
+  same way.  Otherwise every ``EMPLOYEE_REPLICA_INTERVAL`` seconds the
+  polling fingerprint of ``watcher.py`` (write version, document count,
+  newest ``_id``) is compared with what the view expects from the snapshot
+  plus this process's writes; two mismatches in a row schedule a reload.
+- Reloads run on a background thread, at most once per
+  ``EMPLOYEE_REPLICA_RELOAD_INTERVAL``, while the previous view keeps being
+  served; one is also scheduled once more than ``EMPLOYEE_REPLICA_MAX_DELTA``
+  employees are laid over the snapshot.  Employees written during a load
+  are applied to the new snapshot before it is swapped in.
+
+Layout, for N employees (about 110 MB per million with ~15 character names
+and three skills each, against about 1.2 GB for the same rows as dicts; a
+load peaks at roughly three times that and takes ~15 s of one core per
+million rows, off the request path):
+
+- ``_id``: 12 bytes per row in one ``bytearray``
+- strings (``employee_id``, ``name``): UTF-8 bytes in one ``bytearray`` plus
+  a 4-byte offset per row
+- ``id``, ``salary``: ``array('q')``; ``joining_date``: microseconds since
+  the epoch in ``array('q')``
+- ``department``: a 1-byte code per row
+- ``skills``: 4-byte skill codes for all rows in one array, with a 4-byte
+  offset per row
+- ``order``: row numbers in ``LIST_SORT`` order (4 bytes per row), and the
+  same order split per department and per skill (4 bytes per department
+  row and per skill occurrence).  A page of ``list`` or ``search`` is a
+  slice of one of these and the exact count is its length.
+- ``by_employee_id``: row numbers sorted by employee_id, for binary search.
+
+Values that do not fit a column's type (strings where dates are expected,
+documents failing the schema, extra fields) are kept per row in small
+dicts on the side, so every document comes back exactly as stored.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from django.conf import settings
+from django.dispatch import receiver
+
+from .mongo import get_collection
+from .pagination import (ESTIMATED, EXACT, NEXT, NONE, cursor_plan, decode_cursor,
+                         offset_pagination, uncounted_pagination)
+from .signals import employees_changed
+from .watcher import SOURCE as WATCHER_SOURCE, fingerprint
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+EPOCH = datetime(1970, 1, 1)
+
+LOAD_BATCH_SIZE = 10000
+
+
+def to_micros(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def bson_key(value):
+    """
+    Sort key following MongoDB's comparison order across types (missing and
+    null first, then numbers, strings, ..., dates), as ``$sort`` does.
+    """
+    if value is MISSING or value is None:
+        return (1,)
+    if isinstance(value, bool):
+        return (8, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    if isinstance(value, datetime):
+        return (9, to_micros(value))
+    if isinstance(value, ObjectId):
+        return (7, value.binary)
+    return (4, str(value))
+
+
+def fold_salary(doc, salary):
+    """Add one salary to a count/sum/min/max aggregate, as $group would"""
+    if isinstance(salary, (int, float)) and not isinstance(salary, bool):
+        doc['sum'] += salary
+    if salary is not MISSING and salary is not None:
+        # $min/$max compare across types in BSON order
+        if doc['min'] is None or bson_key(salary) < bson_key(doc['min']):
+            doc['min'] = salary
+        if doc['max'] is None or bson_key(salary) > bson_key(doc['max']):
+            doc['max'] = salary
+
+
+def skill_values(skills):
+    """Values a ``{'skills': ...}`` equality query compares against"""
+    if isinstance(skills, (list, tuple)):
+        return [skill for skill in skills if isinstance(skill, str)]
+    if isinstance(skills, str):
+        return [skills]
+    return []
+
+
+def project(doc, projection=None):
+    """``doc`` limited to ``projection``, as ``Snapshot.document`` does for a row"""
+    included = [name for name, include in (projection or {}).items() if include]
+    if not included:
+        return {name: value for name, value in doc.items() if name not in (projection or {})}
+    result = {}
+    if projection.get('_id', 1) and '_id' in doc:
+        result['_id'] = doc['_id']
+    for name in included:
+        if name in doc:
+            result[name] = doc[name]
+    return result
+
+
+def matches(doc, query):
+    """Whether ``doc`` belongs in ``Snapshot.rows(query)``, for the queries it answers"""
+    if not query:
+        return True
+    if 'department' in query:
+        return doc.get('department') == query['department']
+    skills = skill_values(doc.get('skills'))
+    condition = query['skills']
+    if isinstance(condition, str):
+        return condition in skills
+    operator, wanted = next(iter(condition.items()))
+    if operator == '$in':
+        return any(skill in skills for skill in wanted)
+    return bool(wanted) and all(skill in skills for skill in wanted)
+
+
+def bisect_rank(rows, rank, target):
+    """Index of the first of ``rows`` (in display order) whose rank is at least ``target``"""
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        if rank[rows[middle]] < target:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class Column:
+    """Base for the typed columns; ``other`` holds the rows that do not fit"""
+
+    def __init__(self):
+        self.other = {}
+
+    def append(self, row, value):
+        if value is MISSING or not self.accepts(value):
+            self.other[row] = value
+            value = self.placeholder
+        self.store(value)
+
+    def get(self, row):
+        if self.other and row in self.other:
+            return self.other[row]
+        return self.load(row)
+
+
+class ObjectIdColumn(Column):
+    placeholder = ObjectId(b'\0' * 12)
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def accepts(self, value):
+        return isinstance(value, ObjectId)
+
+    def store(self, value):
+        self.data += value.binary
+
+    def load(self, row):
+        return ObjectId(bytes(self.data[row * 12:row * 12 + 12]))
+
+    def nbytes(self):
+        return len(self.data)
+
+
+class StringColumn(Column):
+    placeholder = ''
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+
+    def accepts(self, value):
+        return isinstance(value, str)
+
+    def store(self, value):
+        self.data += value.encode()
+        self.offsets.append(len(self.data))
+
+    def load(self, row):
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode()
+
+    def nbytes(self):
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+
+class IntColumn(Column):
+    placeholder = 0
+
+    def __init__(self):
+        super().__init__()
+        self.data = array('q')
+
+    def accepts(self, value):
+        return type(value) is int and -2 ** 63 <= value < 2 ** 63
+
+    def store(self, value):
+        self.data.append(value)
+
+    def load(self, row):
+        return self.data[row]
+
+    def nbytes(self):
+        return self.data.itemsize * len(self.data)
+
+
+class DateColumn(IntColumn):
+    placeholder = EPOCH
+
+    def accepts(self, value):
+        # Stored datetimes come back naive (UTC) from PyMongo
+        return isinstance(value, datetime) and value.tzinfo is None
+
+    def store(self, value):
+        self.data.append(to_micros(value))
+
+    def load(self, row):
+        return EPOCH + timedelta(microseconds=self.data[row])
+
+
+class CodeColumn(Column):
+    """Low-cardinality strings as a 1-byte code per row"""
+    placeholder = None
+
+    def __init__(self):
+        super().__init__()
+        self.data = array('B')
+        self.values = []
+        self.codes = {}
+
+    def accepts(self, value):
+        return isinstance(value, str) and (value in self.codes or len(self.values) < 255)
+
+    def store(self, value):
+        if value is None:
+            self.data.append(255)
+            return
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        self.data.append(code)
+
+    def load(self, row):
+        return self.values[self.data[row]]
+
+    def nbytes(self):
+        return len(self.data)
+
+
+class ListColumn(Column):
+    """Lists of strings as codes into a shared value table"""
+    placeholder = ()
+
+    def __init__(self):
+        super().__init__()
+        self.data = array('I')
+        self.offsets = array('I', [0])
+        self.values = []
+        self.codes = {}
+
+    def accepts(self, value):
+        return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+    def store(self, value):
+        for item in value:
+            code = self.codes.get(item)
+            if code is None:
+                code = self.codes[item] = len(self.values)
+                self.values.append(item)
+            self.data.append(code)
+        self.offsets.append(len(self.data))
+
+    def load(self, row):
+        return [self.values[code] for code in self.data[self.offsets[row]:self.offsets[row + 1]]]
+
+    def nbytes(self):
+        return (len(self.data) + len(self.offsets)) * self.data.itemsize
+
+
+COLUMNS = [
+    ('_id', ObjectIdColumn),
+    ('id', IntColumn),
+    ('employee_id', StringColumn),
+    ('name', StringColumn),
+    ('department', CodeColumn),
+    ('salary', IntColumn),
+    ('joining_date', DateColumn),
+    ('skills', ListColumn),
+]
+
+
+class Snapshot:
+    """The whole collection at one write version; never modified once built"""
+
+    def __init__(self, version):
+        self.version = version
+        self.own_writes = 0
+        self.size = 0
+        self.columns = {name: column() for name, column in COLUMNS}
+        self.extra = {}
+
+    @classmethod
+    def load(cls, version, collection=None):
+        snapshot = cls(version)
+        collection = collection if collection is not None else get_collection()
+        for doc in collection.find({}, batch_size=LOAD_BATCH_SIZE):
+            snapshot.append(doc)
+        snapshot.index()
+        return snapshot
+
+    def append(self, doc):
+        row = self.size
+        for name, column in self.columns.items():
+            column.append(row, doc.get(name, MISSING))
+        if not doc.keys() <= self.columns.keys():
+            self.extra[row] = {name: value for name, value in doc.items() if name not in self.columns}
+        self.size += 1
+
+    def value(self, row, name):
+        return self.columns[name].get(row)
+
+    def index(self):
+        """Build the sort orders, posting lists and salary aggregates"""
+        employee_id = self.columns['employee_id']
+        self.order = array('I', sorted(range(self.size), key=self.sort_key, reverse=True))
+        self.by_employee_id = array('I', sorted(
+            range(self.size),
+            key=lambda row: bson_key(employee_id.get(row)) if row in employee_id.other else (3, employee_id.load(row))))
+        self.rank = array('I', bytes(4 * self.size))
+        for position, row in enumerate(self.order):
+            self.rank[row] = position
+
+        # Posting lists in display order, built from the codes; rows whose
+        # value is kept on the side take the slow path
+        department, skills = self.columns['department'], self.columns['skills']
+        departments = [array('I') for _ in department.values]
+        skill_rows = [array('I') for _ in skills.values]
+        by_department, by_skill = {}, {}
+        codes, offsets, skill_codes = department.data, skills.offsets, skills.data
+        for row in self.order:
+            if department.other and row in department.other:
+                if isinstance(department.other[row], str):
+                    by_department.setdefault(department.other[row], array('I')).append(row)
+            else:
+                departments[codes[row]].append(row)
+            if skills.other and row in skills.other:
+                for skill in set(self.skills_of(row)):
+                    by_skill.setdefault(skill, array('I')).append(row)
+            else:
+                start, end = offsets[row], offsets[row + 1]
+                if end - start == 1:
+                    skill_rows[skill_codes[start]].append(row)
+                elif end > start:
+                    for code in set(skill_codes[start:end]):
+                        skill_rows[code].append(row)
+
+        self.by_department = self.merge_postings(department.values, departments, by_department)
+        self.by_skill = self.merge_postings(skills.values, skill_rows, by_skill)
+        self.salary_stats = self.aggregate_salaries()
+
+    def merge_postings(self, values, postings, slow):
+        merged = {value: rows for value, rows in zip(values, postings) if rows}
+        for value, rows in slow.items():
+            if value in merged:
+                rows = array('I', heapq.merge(merged[value], rows, key=self.rank.__getitem__))
+            merged[value] = rows
+        return merged
+
+    def sort_key(self, row):
+        """``LIST_SORT`` key of a row (or of a document): ``(joining_date, employee_id)``"""
+        if isinstance(row, dict):
+            return bson_key(row.get('joining_date', MISSING)), bson_key(row.get('employee_id', MISSING))
+        joining_date, employee_id = self.columns['joining_date'], self.columns['employee_id']
+        if joining_date.other and row in joining_date.other:
+            date_key = bson_key(joining_date.other[row])
+        else:
+            date_key = (9, joining_date.data[row])
+        if employee_id.other and row in employee_id.other:
+            return date_key, bson_key(employee_id.other[row])
+        return date_key, (3, employee_id.load(row))
+
+    def skills_of(self, row):
+        return skill_values(self.value(row, 'skills'))
+
+    def aggregate_salaries(self):
+        """Same figures as ``salary_stats.GROUP_STAGE``"""
+        department, salary = self.columns['department'], self.columns['salary']
+        stats = {}
+        for name, rows in self.by_department.items():
+            if salary.other:
+                plain = [salary.data[row] for row in rows if row not in salary.other]
+            else:
+                plain = [salary.data[row] for row in rows]
+            doc = stats[name] = {
+                '_id': name, 'count': len(rows), 'sum': sum(plain),
+                'min': min(plain, default=None), 'max': max(plain, default=None),
+            }
+            if salary.other:
+                for row in rows:
+                    if row in salary.other:
+                        fold_salary(doc, salary.other[row])
+        for row, value in department.other.items():
+            if isinstance(value, str):
+                continue
+            key = None if value is MISSING else value
+            doc = stats.setdefault(key, {'_id': key, 'count': 0, 'sum': 0, 'min': None, 'max': None})
+            doc['count'] += 1
+            fold_salary(doc, salary.get(row))
+        return stats
+
+    def document(self, row, projection=None):
+        """The stored document for ``row``, limited to ``projection`` when given"""
+        if isinstance(row, dict):
+            return project(row, projection)
+        included = [name for name, include in (projection or {}).items() if include]
+        if not included:
+            # No projection, or only exclusions such as {'_id': 0}
+            doc = {}
+            for name in self.columns:
+                value = self.value(row, name)
+                if value is not MISSING:
+                    doc[name] = value
+            doc.update(self.extra.get(row, ()))
+            for name, include in (projection or {}).items():
+                doc.pop(name, None)
+            return doc
+
+        doc = {}
+        if projection.get('_id', 1):
+            doc['_id'] = self.value(row, '_id')
+        for name in included:
+            value = self.value(row, name) if name in self.columns else self.extra.get(row, {}).get(name, MISSING)
+            if value is not MISSING:
+                doc[name] = value
+        return doc
+
+    def get(self, employee_id, projection=None):
+        """The document with ``employee_id``, or None"""
+        row = self.row_of(employee_id)
+        return None if row is None else self.document(row, projection)
+
+    def row_of(self, employee_id):
+        """The row holding ``employee_id``, or None"""
+        key = bson_key(employee_id)
+        rows = self.by_employee_id
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            if bson_key(self.value(rows[middle], 'employee_id')) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(rows) and self.value(rows[low], 'employee_id') == employee_id:
+            return rows[low]
+        return None
+
+    def slot(self, key):
+        """Position in ``order`` a row with sort key ``key`` would take"""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_key(self.order[middle]) > key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def rows(self, query):
+        """
+        Rows matching ``query`` in ``LIST_SORT`` order, or None when the
+        query is not one the replica answers (the caller then asks Mongo).
+        """
+        if not query:
+            return self.order
+        if set(query) == {'department'} and isinstance(query['department'], str):
+            return self.by_department.get(query['department'], ())
+        if set(query) != {'skills'}:
+            return None
+        condition = query['skills']
+        if isinstance(condition, str):
+            return self.by_skill.get(condition, ())
+        if not isinstance(condition, dict) or len(condition) != 1:
+            return None
+        operator, skills = next(iter(condition.items()))
+        if operator not in ('$all', '$in') or not all(isinstance(skill, str) for skill in skills):
+            return None
+
+        postings = [self.by_skill.get(skill, ()) for skill in skills]
+        if operator == '$in':
+            merged = heapq.merge(*postings, key=self.rank.__getitem__)
+            seen = set()
+            return [row for row in merged if not (row in seen or seen.add(row))]
+        if not postings:
+            return []
+        postings.sort(key=len)
+        others = [set(rows) for rows in postings[1:]]
+        return [row for row in postings[0] if all(row in rows for rows in others)]
+
+    def offset_page(self, rows, page, page_size, projection=None, count=EXACT):
+        """Same contract as ``pagination.offset_page``"""
+        skip = (page - 1) * page_size
+        documents = [self.document(row, projection) for row in rows[skip:skip + page_size]]
+        if count == NONE:
+            return documents, lambda: uncounted_pagination(page, page_size, len(rows) > skip + page_size)
+
+        def pagination():
+            # Counting is free here, so estimated totals are exact too
+            metadata = offset_pagination(len(rows), page, page_size)
+            if count == ESTIMATED:
+                metadata['total_count_estimated'] = True
+            return metadata
+        return documents, pagination
+
+    def cursor_page(self, query, rows, page_size, token=None, projection=None):
+        """Same contract as ``pagination.cursor_page``; raises ``InvalidCursor``"""
+        plan = cursor_plan(query, token, projection)
+        if token:
+            direction, joining_date, employee_id = decode_cursor(token)
+            # Rows are in descending key order: find the first one at or below the cursor
+            key = (bson_key(joining_date), bson_key(employee_id))
+            low, high = 0, len(rows)
+            while low < high:
+                middle = (low + high) // 2
+                if self.sort_key(rows[middle]) > key:
+                    low = middle + 1
+                else:
+                    high = middle
+            if direction == NEXT:
+                if low < len(rows) and self.sort_key(rows[low]) == key:
+                    low += 1
+                selected = rows[low:low + page_size + 1]
+            else:
+                selected = rows[max(low - page_size - 1, 0):low][::-1]
+        else:
+            selected = rows[:page_size + 1]
+        documents = [self.document(row, plan.projection) for row in selected]
+        return plan.page(documents, page_size)
+
+    def nbytes(self):
+        """Approximate bytes held in the arrays (the side dicts not included)"""
+        arrays = [self.order, self.rank, self.by_employee_id,
+                  *self.by_department.values(), *self.by_skill.values()]
+        return (sum(column.nbytes() for column in self.columns.values())
+                + sum(rows.itemsize * len(rows) for rows in arrays))
+
+
+class MergedRows:
+    """
+    A query's snapshot rows with a view's changes applied: the rows of
+    changed employees are left out and their current documents slotted in
+    at their sort position.  Supports ``len()``, indexing and slicing, which
+    is all the paging code uses.
+    """
+
+    def __init__(self, rows, removed, inserted):
+        # removed: positions in ``rows``, ascending; inserted: (position, document)
+        # pairs in display order, a document going before the row at its position
+        self.segments = []
+        self.starts = []
+        self.length = 0
+        start = 0
+        removed = iter(removed)
+        skip = next(removed, None)
+        for position, doc in inserted:
+            while skip is not None and skip < position:
+                self.add_rows(rows, start, skip)
+                start = skip + 1
+                skip = next(removed, None)
+            self.add_rows(rows, start, position)
+            start = max(start, position)
+            self.add(doc, 1)
+        while skip is not None:
+            self.add_rows(rows, start, skip)
+            start = skip + 1
+            skip = next(removed, None)
+        self.add_rows(rows, start, len(rows))
+
+    def add(self, segment, size):
+        self.starts.append(self.length)
+        self.segments.append(segment)
+        self.length += size
+
+    def add_rows(self, rows, start, end):
+        if end > start:
+            self.add(rows[start:end], end - start)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.length)
+            if step != 1:
+                return [self[index] for index in range(start, stop, step)]
+            result = []
+            index = max(bisect.bisect_right(self.starts, start) - 1, 0)
+            while start < stop and index < len(self.segments):
+                segment, offset = self.segments[index], self.starts[index]
+                if isinstance(segment, dict):
+                    result.append(segment)
+                else:
+                    result.extend(segment[start - offset:stop - offset])
+                start = offset + (1 if isinstance(segment, dict) else len(segment))
+                index += 1
+            return result
+        if item < 0:
+            item += self.length
+        if not 0 <= item < self.length:
+            raise IndexError(item)
+        index = bisect.bisect_right(self.starts, item) - 1
+        segment = self.segments[index]
+        return segment if isinstance(segment, dict) else segment[item - self.starts[index]]
+
+
+class View:
+    """
+    A snapshot plus the employees written since it was loaded, which is
+    what requests read.  Writes make a new view; neither is modified after.
+    """
+
+    def __init__(self, snapshot, delta=None, dead=None, added=None):
+        self.snapshot = snapshot
+        # employee_id -> current document, or None once deleted
+        self.delta = delta or {}
+        # snapshot row -> employee_id, for the rows the delta replaces
+        self.dead = dead or {}
+        # employee_id -> (slot in snapshot.order, sort key, document)
+        self.added = added or {}
+        self._rows = {}
+        self._salary_stats = None
+
+    def changed(self, documents):
+        """A new view with ``documents`` (employee_id -> document or None) applied"""
+        snapshot = self.snapshot
+        dead, added = dict(self.dead), dict(self.added)
+        for employee_id, doc in documents.items():
+            row = snapshot.row_of(employee_id)
+            if row is not None:
+                dead[row] = employee_id
+            if doc is None:
+                added.pop(employee_id, None)
+            else:
+                key = snapshot.sort_key(doc)
+                added[employee_id] = (snapshot.slot(key), key, doc)
+        return View(snapshot, {**self.delta, **documents}, dead, added)
+
+    @property
+    def salary_stats(self):
+        if self._salary_stats is None:
+            self._salary_stats = self.aggregate_salaries()
+        return self._salary_stats
+
+    def get(self, employee_id, projection=None):
+        if employee_id in self.delta:
+            doc = self.delta[employee_id]
+            return None if doc is None else project(doc, projection)
+        return self.snapshot.get(employee_id, projection)
+
+    def rows(self, query):
+        rows = self.snapshot.rows(query)
+        if rows is None or not self.delta:
+            return rows
+        cache_key = repr(sorted(query.items()))
+        merged = self._rows.get(cache_key)
+        if merged is None:
+            rank = self.snapshot.rank
+            removed = []
+            for row in self.dead:
+                position = bisect_rank(rows, rank, rank[row])
+                if position < len(rows) and rows[position] == row:
+                    removed.append(position)
+            inserted = sorted(
+                ((bisect_rank(rows, rank, slot), key, doc)
+                 for slot, key, doc in self.added.values() if matches(doc, query)),
+                key=lambda item: item[1], reverse=True)
+            merged = MergedRows(rows, sorted(removed), [(position, doc) for position, _, doc in inserted])
+            if len(self._rows) < 64:
+                self._rows[cache_key] = merged
+        return merged
+
+    def offset_page(self, *args, **kwargs):
+        return self.snapshot.offset_page(*args, **kwargs)
+
+    def cursor_page(self, *args, **kwargs):
+        return self.snapshot.cursor_page(*args, **kwargs)
+
+    def aggregate_salaries(self):
+        """The snapshot's salary aggregates with the delta applied"""
+        snapshot = self.snapshot
+        stats = {key: dict(doc) for key, doc in snapshot.salary_stats.items()}
+        recompute = set()
+        for row in self.dead:
+            department = snapshot.value(row, 'department')
+            key = None if department is MISSING else department
+            salary = snapshot.value(row, 'salary')
+            doc = stats[key]
+            doc['count'] -= 1
+            if isinstance(salary, (int, float)) and not isinstance(salary, bool):
+                doc['sum'] -= salary
+            if salary is not MISSING and salary is not None and salary in (doc['min'], doc['max']):
+                recompute.add(key)
+        for _, _, doc in self.added.values():
+            key = doc.get('department')
+            fold = stats.setdefault(key, {'_id': key, 'count': 0, 'sum': 0, 'min': None, 'max': None})
+            fold['count'] += 1
+            fold_salary(fold, doc.get('salary', MISSING))
+        for key in recompute:
+            doc = stats[key]
+            doc['min'] = doc['max'] = None
+            for salary in self.department_salaries(key):
+                if salary is not MISSING and salary is not None:
+                    if doc['min'] is None or bson_key(salary) < bson_key(doc['min']):
+                        doc['min'] = salary
+                    if doc['max'] is None or bson_key(salary) > bson_key(doc['max']):
+                        doc['max'] = salary
+        return {key: doc for key, doc in stats.items() if doc['count']}
+
+    def department_salaries(self, key):
+        snapshot = self.snapshot
+        if isinstance(key, str):
+            rows = snapshot.by_department.get(key, ())
+        else:
+            rows = [row for row, value in snapshot.columns['department'].other.items()
+                    if not isinstance(value, str) and (None if value is MISSING else value) == key]
+        for row in rows:
+            if row not in self.dead:
+                yield snapshot.value(row, 'salary')
+        for _, _, doc in self.added.values():
+            if doc.get('department') == key:
+                yield doc.get('salary', MISSING)
+
+    def fingerprint(self, own_writes):
+        """
+        The ``fingerprint()`` Mongo should report if only this process has
+        written since the load, ``own_writes`` times as far as the write
+        version goes; None where it cannot be told (the newest employee was
+        deleted).
+        """
+        version, count, newest = self.snapshot.version
+        version += own_writes
+        count += len(self.added) - len(self.dead)
+        if newest is not None and any(snapshot_id == newest for snapshot_id in self.dead_ids()):
+            return None
+        for _, _, doc in self.added.values():
+            if isinstance(doc.get('_id'), ObjectId) and (newest is None or doc['_id'] > newest):
+                newest = doc['_id']
+        return [version, count, newest]
+
+    def dead_ids(self):
+        return (self.snapshot.value(row, '_id') for row in self.dead)
+
+
+class Replica:
+    """
+    Hands out the current view, or None until one is loaded (and while a
+    write too large to apply is being reloaded).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Serialises fetching and applying changes, so views never go back in time
+        self._apply_lock = threading.Lock()
+        self._view = None
+        self._generation = 0
+        self._loaded_generation = None
+        self._loading = False
+        self._reload_due = False
+        self._loaded_at = None
+        self._checked_at = None
+        self._mismatched = False
+        # Writes signalled in this process, and how many a snapshot had seen
+        self._own_writes = 0
+        # Employees written while a load runs, applied again to the new snapshot
+        self._changed_during_load = None
+
+    def enabled(self):
+        return getattr(settings, 'EMPLOYEE_REPLICA_ENABLED', False)
+
+    def current(self):
+        if not self.enabled():
+            return None
+        now = time.monotonic()
+        interval = getattr(settings, 'EMPLOYEE_REPLICA_INTERVAL', 1.0)
+        with self._lock:
+            # The change watcher delivers other processes' writes itself
+            check = (not getattr(settings, 'EMPLOYEE_CHANGE_WATCHER', False)
+                     and (self._checked_at is None or now - self._checked_at >= interval))
+            if check:
+                self._checked_at = now
+        if check:
+            self.check()
+
+        with self._lock:
+            if self._view is None or self._loaded_generation != self._generation:
+                self.start_load()
+                return None
+            if self._reload_due:
+                reload_interval = getattr(settings, 'EMPLOYEE_REPLICA_RELOAD_INTERVAL', 30.0)
+                if self._loaded_at is None or now - self._loaded_at >= reload_interval:
+                    self.start_load()
+            return self._view
+
+    def start_load(self):
+        # Called with the lock held
+        if not self._loading:
+            self._loading = True
+            self._reload_due = False
+            self._loaded_at = time.monotonic()
+            threading.Thread(target=self.reload, name='employee-replica', daemon=True).start()
+
+    def reload(self):
+        try:
+            with self._lock:
+                generation = self._generation
+                own_writes = self._own_writes
+                self._changed_during_load = set()
+            snapshot = Snapshot.load(fingerprint())
+            snapshot.own_writes = own_writes
+            with self._apply_lock:
+                with self._lock:
+                    changed, self._changed_during_load = self._changed_during_load, None
+                view = View(snapshot)
+                if changed:
+                    view = view.changed(self.fetch(changed))
+                with self._lock:
+                    self._view = view
+                    self._loaded_generation = generation
+                    self._mismatched = False
+        except Exception:
+            logger.exception('Loading the employee replica failed')
+        finally:
+            with self._lock:
+                self._loading = False
+                self._changed_during_load = None
+
+    def check(self):
+        """
+        Compare Mongo's fingerprint with the one this view expects.  Two
+        mismatches in a row (the first may be a write of ours in flight)
+        mean another process wrote, and schedule a reload.
+        """
+        with self._lock:
+            view = self._view
+            if view is None or self._loading:
+                return
+            own_writes = self._own_writes - view.snapshot.own_writes
+        if not getattr(settings, 'EMPLOYEE_WRITE_VERSION', False):
+            own_writes = 0
+        expected = view.fingerprint(own_writes)
+        matched = expected is not None and fingerprint() == expected
+        with self._lock:
+            if matched:
+                self._mismatched = False
+            elif self._mismatched or expected is None:
+                self._mismatched = False
+                self._reload_due = True
+            else:
+                self._mismatched = True
+
+    def fetch(self, employee_ids):
+        """Current documents of ``employee_ids``, None for the deleted ones"""
+        documents = dict.fromkeys(employee_ids)
+        for doc in get_collection().find({'employee_id': {'$in': list(employee_ids)}}):
+            documents[doc['employee_id']] = doc
+        return documents
+
+    def apply(self, employee_ids, own_write=False):
+        """Bring the employees in ``employee_ids`` up to date in the view"""
+        with self._apply_lock:
+            with self._lock:
+                self._own_writes += own_write
+                if self._view is None and self._changed_during_load is None:
+                    return
+            documents = self.fetch(employee_ids) if employee_ids else {}
+            with self._lock:
+                if self._changed_during_load is not None:
+                    self._changed_during_load.update(employee_ids)
+                if self._view is not None:
+                    self._view = self._view.changed(documents)
+                    if len(self._view.delta) > getattr(settings, 'EMPLOYEE_REPLICA_MAX_DELTA', 1000):
+                        self._reload_due = True
+
+    def invalidate(self):
+        """After a write too large to apply: serve from Mongo until reloaded"""
+        with self._lock:
+            self._own_writes += 1
+            self._generation += 1
+
+    def reload_soon(self):
+        """Reload within the rate limit, serving the current view meanwhile"""
+        with self._lock:
+            self._reload_due = True
+
+
+replica = Replica()
+
+
+def current():
+    return replica.current()
+
+
+@receiver(employees_changed)
+def update_replica(sender, changes, source=None, employee_ids=None, **kwargs):
+    if not replica.enabled():
+        return
+    own_write = source != WATCHER_SOURCE
+    if changes is not None:
+        employee_ids = {doc['employee_id'] for pair in changes for doc in pair
+                        if doc is not None and 'employee_id' in doc}
+    if employee_ids is not None:
+        replica.apply(employee_ids, own_write)
+    elif own_write:
+        replica.invalidate()
+    else:
+        replica.reload_soon()
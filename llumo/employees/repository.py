@@ -0,0 +1,82 @@
+"""
+Document repository for ``Employee``.
+
+Single-document reads and writes by ``employee_id`` go straight to PyMongo
+and the unique ``employee_id`` index, skipping Djongo's SQL parsing and
+translation on every call.
+"""
+
+from datetime import datetime
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .models import Employee
+from .mongo import get_collection
+
+
+class DuplicateEmployee(Exception):
+    pass
+
+
+class EmployeeRepository:
+    # Djongo's internal fields are not part of the API
+    projection = {'_id': 0}
+
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else get_collection()
+
+    def get(self, employee_id, projection=None):
+        """Return the employee document or None"""
+        return self.collection.find_one({'employee_id': employee_id}, projection or self.projection)
+
+    def insert(self, doc):
+        """Insert a new employee, relying on the unique index for duplicates"""
+        try:
+            # insert_one adds _id to the dict it is given
+            self.collection.insert_one(dict(doc))
+        except DuplicateKeyError:
+            raise DuplicateEmployee(doc.get('employee_id'))
+        return doc
+
+    def update(self, employee_id, fields):
+        """
+        Set ``fields`` on an employee in one round trip.
+
+        Returns ``(before, after)`` or None when the employee does not exist.
+        """
+        before = self.collection.find_one_and_update(
+            {'employee_id': employee_id},
+            {'$set': fields},
+            projection=self.projection,
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        return before, dict(before, **fields)
+
+    def delete(self, employee_id):
+        """
+        Delete an employee and return the removed document, or None.
+
+        ``find_one_and_delete`` is a single round trip like ``delete_one`` but
+        also hands back the deleted values for the derived aggregates.  The
+        ``_id`` is kept: delete change events carry nothing else, and the
+        change watcher matches them against this process's own writes.
+        """
+        return self.collection.find_one_and_delete({'employee_id': employee_id})
+
+
+def to_instance(doc):
+    """
+    Wrap a stored document in an unsaved ``Employee`` for serializer output.
+
+    No query is made; this only gives ``EmployeeSerializer`` the attribute
+    access it expects.
+    """
+    fields = {field.attname: doc[field.attname] for field in Employee._meta.concrete_fields
+              if field.attname in doc}
+    joining_date = fields.get('joining_date')
+    if isinstance(joining_date, datetime):
+        fields['joining_date'] = joining_date.date()
+    return Employee(**fields)
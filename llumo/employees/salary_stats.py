@@ -0,0 +1,290 @@
+"""
+Materialized per-department salary aggregates.
+
+``/employees/avg-salary/`` used to run a ``$group`` over the whole employees
+collection on every request.  The numbers only change when an employee is
+written, so they are kept in the ``employee_salary_stats`` collection instead
+(one document per department holding count, sum, min and max) and updated
+incrementally from the ``employees_changed`` signal.  Writes made outside the
+API reach them through the ``watch_employees`` change-stream watcher.
+
+Count and sum are adjusted with ``$inc`` and new values are folded in with
+``$min``/``$max``.  Removing the current minimum or maximum cannot be undone
+incrementally, so that department is recomputed with an indexed ``$group``.
+
+``rebuild()`` also stores a ``BUILT_ID`` marker document, so an empty
+collection of employees is not mistaken for aggregates never built (and
+rebuilt on every read).
+"""
+
+import math
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.dispatch import receiver
+from pymongo import ReturnDocument
+
+from .mongo import get_collection
+from .signals import employees_changed
+
+STATS_COLLECTION = 'employee_salary_stats'
+
+# _id of the marker document; not a department
+BUILT_ID = '__built__'
+
+GROUP_STAGE = {
+    '$group': {
+        '_id': '$department',
+        'count': {'$sum': 1},
+        'sum': {'$sum': '$salary'},
+        'min': {'$min': '$salary'},
+        'max': {'$max': '$salary'},
+    }
+}
+
+
+def stats_collection():
+    return get_collection(STATS_COLLECTION)
+
+
+def live_stats(departments=None):
+    """Aggregate count/sum/min/max straight from the employees collection"""
+    pipeline = [GROUP_STAGE]
+    if departments is not None:
+        pipeline.insert(0, {'$match': {'department': {'$in': list(departments)}}})
+    return {doc['_id']: doc for doc in get_collection().aggregate(pipeline)}
+
+
+def stats_from(docs):
+    """Stats documents keyed by department, or None when never built (no marker)"""
+    stats = {doc['_id']: doc for doc in docs}
+    if stats.pop(BUILT_ID, None) is None:
+        return None
+    return stats
+
+
+def read_stats():
+    """
+    Materialized aggregates keyed by department.
+
+    Built from scratch the first time, when the marker is still missing.
+    """
+    stats = stats_from(stats_collection().find())
+    if stats is None:
+        stats = rebuild()
+    return stats
+
+
+def summarize(stats, exact=False):
+    """The ``avg-salary`` response rows for ``read_stats()`` output"""
+    output = []
+    for department, doc in sorted(stats.items(), key=lambda item: str(item[0])):
+        avg = doc['sum'] / doc['count']
+        output.append({
+            'department': department,
+            'avg_salary': avg if exact else int(avg),
+            'employee_count': doc['count'],
+            'min_salary': doc['min'],
+            'max_salary': doc['max'],
+        })
+    return output
+
+
+def recompute_departments(departments):
+    """Replace the aggregates for ``departments`` with freshly grouped values"""
+    departments = set(departments)
+    if not departments:
+        return
+    fresh = live_stats(departments)
+    collection = stats_collection()
+    for department in departments:
+        if department in fresh:
+            collection.replace_one({'_id': department}, fresh[department], upsert=True)
+        else:
+            collection.delete_one({'_id': department})
+
+
+def rebuild():
+    """Recompute every department's aggregate and drop departments that vanished"""
+    fresh = live_stats()
+    collection = stats_collection()
+    for department, doc in fresh.items():
+        collection.replace_one({'_id': department}, doc, upsert=True)
+    collection.delete_many({'_id': {'$nin': list(fresh) + [BUILT_ID]}})
+    collection.replace_one({'_id': BUILT_ID}, {'_id': BUILT_ID}, upsert=True)
+    return fresh
+
+
+def drift():
+    """
+    Compare the materialized aggregates with a live ``$group``.
+
+    Returns a list of ``(department, field, materialized, live)`` tuples for
+    every value that disagrees.
+    """
+    materialized = {doc['_id']: doc for doc in stats_collection().find({'_id': {'$ne': BUILT_ID}})}
+    live = live_stats()
+    differences = []
+    for department in sorted(set(materialized) | set(live), key=str):
+        stored = materialized.get(department, {})
+        actual = live.get(department, {})
+        for field in ('count', 'sum', 'min', 'max'):
+            if stored.get(field) != actual.get(field):
+                differences.append((department, field, stored.get(field), actual.get(field)))
+    return differences
+
+
+def apply_changes(changes):
+    """Fold ``(before, after)`` employee pairs into the materialized aggregates"""
+    added = defaultdict(list)
+    removed = defaultdict(list)
+    for before, after in changes:
+        if before is not None and after is not None and \
+                (before.get('department'), before.get('salary')) == (after.get('department'), after.get('salary')):
+            continue
+        if before is not None:
+            removed[before.get('department')].append(before.get('salary'))
+        if after is not None:
+            added[after.get('department')].append(after.get('salary'))
+
+    collection = stats_collection()
+    if collection.find_one({'_id': BUILT_ID}) is None:
+        # Never built: the increments would describe only these writes
+        rebuild()
+        return
+
+    stale = set()
+    for department in set(added) | set(removed):
+        new_salaries = [s for s in added[department] if s is not None]
+        old_salaries = [s for s in removed[department] if s is not None]
+
+        update = {'$inc': {
+            'count': len(added[department]) - len(removed[department]),
+            'sum': sum(new_salaries) - sum(old_salaries),
+        }}
+        if new_salaries:
+            update['$min'] = {'min': min(new_salaries)}
+            update['$max'] = {'max': max(new_salaries)}
+
+        doc = collection.find_one_and_update(
+            {'_id': department}, update,
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        if doc['count'] <= 0:
+            collection.delete_one({'_id': department})
+        elif any(s <= doc.get('min', s) or s >= doc.get('max', s) for s in old_salaries):
+            # An extreme value left the department
+            stale.add(department)
+
+    recompute_departments(stale)
+
+
+GROUP_KEYS = {
+    'department': '$department',
+    # joining_date may be stored as a date or an ISO string
+    'joining_year': {'$year': {'$convert': {
+        'input': '$joining_date', 'to': 'date', 'onError': None, 'onNull': None,
+    }}},
+}
+
+PERCENTILES = (50, 90, 99)
+
+# Lower bounds of the histogram (and salary facet) buckets; the last one is
+# the upper bound
+SALARY_BUCKETS = [0, 25000, 50000, 75000, 100000, 150000, 200000, 500000, 1000001]
+
+
+def distribution(group_by='department', resolution=1):
+    """
+    Count, mean, min, max, percentiles and a histogram per group.
+
+    One aggregation groups salaries by ``(group, salary)`` and returns each
+    group's sorted ``(salary, count)`` pairs; percentiles and the histogram
+    are then read off those pairs.  The result size grows with the number of
+    distinct salaries, so ``resolution`` rounds salaries down to a multiple
+    of itself first: percentiles are then accurate to within ``resolution``
+    while count, mean, min and max stay exact.
+    """
+    if resolution > 1:
+        value = {'$subtract': ['$salary', {'$mod': ['$salary', resolution]}]}
+    else:
+        value = '$salary'
+    pipeline = [
+        {'$match': {'salary': {'$type': 'number'}}},
+        {'$group': {
+            '_id': {'group': GROUP_KEYS[group_by], 'value': value},
+            'count': {'$sum': 1},
+            'sum': {'$sum': '$salary'},
+            'min': {'$min': '$salary'},
+            'max': {'$max': '$salary'},
+        }},
+        {'$sort': {'_id.value': 1}},
+        {'$group': {
+            '_id': '$_id.group',
+            'count': {'$sum': '$count'},
+            'sum': {'$sum': '$sum'},
+            'min': {'$min': '$min'},
+            'max': {'$max': '$max'},
+            'values': {'$push': {'value': '$_id.value', 'count': '$count'}},
+        }},
+    ]
+    output = []
+    groups = get_collection().aggregate(pipeline, allowDiskUse=True)
+    for doc in sorted(groups, key=lambda doc: (doc['_id'] is None, str(doc['_id']))):
+        values = [(item['value'], item['count']) for item in doc['values']]
+        entry = {
+            group_by: doc['_id'],
+            'count': doc['count'],
+            'mean': doc['sum'] / doc['count'],
+            'min': doc['min'],
+            'max': doc['max'],
+        }
+        for percent in PERCENTILES:
+            entry[f'p{percent}'] = percentile(values, doc['count'], percent)
+        entry['histogram'] = histogram(values)
+        output.append(entry)
+    return output
+
+
+def percentile(values, total, percent):
+    """Nearest-rank percentile of sorted ``(value, count)`` pairs"""
+    rank = max(math.ceil(percent / 100.0 * total), 1)
+    seen = 0
+    for value, count in values:
+        seen += count
+        if seen >= rank:
+            return value
+    return values[-1][0]
+
+
+def histogram(values):
+    """Counts per ``SALARY_BUCKETS`` bucket, including empty ones"""
+    counts = [0] * (len(SALARY_BUCKETS) - 1)
+    other = 0
+    for value, count in values:
+        if SALARY_BUCKETS[0] <= value < SALARY_BUCKETS[-1]:
+            counts[bisect_right(SALARY_BUCKETS, value) - 1] += count
+        else:
+            other += count
+    buckets = [
+        {'min': SALARY_BUCKETS[i], 'max': SALARY_BUCKETS[i + 1] - 1, 'count': count}
+        for i, count in enumerate(counts)
+    ]
+    if other:
+        buckets.append({'min': None, 'max': None, 'count': other})
+    return buckets
+
+
+@receiver(employees_changed)
+def update_salary_stats(sender, changes, source=None, shared=False, departments=None, **kwargs):
+    if changes is not None:
+        apply_changes(changes)
+    elif source != 'watcher':
+        rebuild()
+    elif shared:
+        # Change events also cover writes whose deltas were already applied,
+        # so recompute instead; only the watch_employees watcher does this
+        if departments is None:
+            rebuild()
+        else:
+            recompute_departments(departments)
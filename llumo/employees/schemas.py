@@ -2,6 +2,8 @@
 MongoDB JSON Schema definitions for collections
 """
 
+from .validation import compile_schema
+
 EMPLOYEE_SCHEMA = {
     "$jsonSchema": {
         "bsonType": "object",
@@ -91,4 +93,8 @@ USER_SCHEMA = {
         },
         "additionalProperties": True
     }
-}
\ No newline at end of file
+}
+
+# Compiled once at import for in-process validation (see validation.py)
+EMPLOYEE_VALIDATOR = compile_schema(EMPLOYEE_SCHEMA)
+USER_VALIDATOR = compile_schema(USER_SCHEMA)
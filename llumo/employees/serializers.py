@@ -1,7 +1,33 @@
 from rest_framework import serializers
 from .models import Employee
+from .schemas import EMPLOYEE_VALIDATOR
 
 class EmployeeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            # Sparse fieldset (?fields=): leave the other fields out of the output
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def validate(self, attrs):
+        # Same rules as the collection's $jsonSchema, checked before any I/O
+        errors = EMPLOYEE_VALIDATOR.errors(attrs, partial=self.partial)
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class EmployeeWriteSerializer(EmployeeSerializer):
+    """
+    Validates payloads for the document writes (single and bulk).
+
+    Uniqueness of employee_id is left to the unique index instead of a
+    query per row.
+    """
+    class Meta(EmployeeSerializer.Meta):
+        extra_kwargs = {'employee_id': {'validators': []}}
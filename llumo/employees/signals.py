@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+# Sent after employee documents are written.  ``changes`` is a list of
+# ``(before, after)`` pairs of employee dicts; ``before`` is None for an
+# insert and ``after`` is None for a delete.  ``changes`` is None after writes
+# too large to list (such as an import): receivers then rebuild what they derive.
+# Watcher signals may also carry ``employee_ids``, the employees written.
+employees_changed = Signal()
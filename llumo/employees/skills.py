@@ -0,0 +1,158 @@
+"""
+In-memory skill index for type-ahead.
+
+Distinct skills are kept in a list sorted case-insensitively, next to the
+number of employees listing each one.  A prefix lookup is a ``bisect`` into
+that list followed by a short scan, so ``/employees/skills/`` never touches
+Mongo once the index is built.
+
+The index is built with a single aggregation when the server starts (or by
+the first lookup, should that come earlier) and then kept current from the
+``employees_changed`` signal.  Full refreshes (imports, bulk updates, the
+change watcher) rebuild it on a background thread while lookups keep using
+the previous index; only one build runs at a time.  Like the other derived
+data it is per process: writes made by other workers reach it through the
+change watcher.
+"""
+
+import heapq
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.dispatch import receiver
+
+from .mongo import get_collection
+from .signals import employees_changed
+
+logger = logging.getLogger(__name__)
+
+PIPELINE = [
+    {'$match': {'skills.0': {'$exists': True}}},
+    {'$unwind': '$skills'},
+    {'$match': {'skills': {'$type': 'string'}}},
+    # Count employees, not occurrences, should a skill be listed twice
+    {'$group': {'_id': {'employee': '$_id', 'skill': '$skills'}}},
+    {'$group': {'_id': '$_id.skill', 'count': {'$sum': 1}}},
+]
+
+
+def employee_skills(doc):
+    """Distinct string skills of an employee document (or None)"""
+    skills = (doc or {}).get('skills')
+    if not isinstance(skills, (list, tuple)):
+        return set()
+    return {skill for skill in skills if isinstance(skill, str)}
+
+
+class SkillIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for the whole aggregation: one build at a time
+        self._build_lock = threading.Lock()
+        self._keys = []
+        self._counts = {}
+        self._built = False
+        self._queued = False
+        # Bumped by every change, to tell whether a build may have missed one
+        self._version = 0
+
+    def build(self, initial=False, queued=False):
+        """
+        Replace the index with a fresh aggregation.  With ``initial``, return
+        at once if another caller has built it meanwhile.
+        """
+        with self._build_lock:
+            with self._lock:
+                if initial and self._built:
+                    return
+                if queued:
+                    self._queued = False
+                version = self._version
+            counts = {doc['_id']: doc['count'] for doc in get_collection().aggregate(PIPELINE)}
+            keys = sorted((skill.casefold(), skill) for skill in counts)
+            with self._lock:
+                self._keys, self._counts = keys, counts
+                self._built = True
+                missed = self._version != version
+        if missed:
+            # Written while aggregating: the result may predate the write
+            self.refresh()
+
+    def refresh(self):
+        """
+        Rebuild on a background thread; lookups use the current index
+        meanwhile.  Requests made while a rebuild waits are folded into it.
+        """
+        with self._lock:
+            if self._queued:
+                return
+            self._queued = True
+        threading.Thread(target=self._rebuild, name='skill-index-build', daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.build(queued=True)
+        except Exception:
+            with self._lock:
+                self._queued = False
+            logger.exception('Skill index build failed')
+
+    def lookup(self, prefix='', limit=10):
+        """
+        Up to ``limit`` ``(skill, employee_count)`` pairs whose skill starts
+        with ``prefix`` (case-insensitive), most common first.
+        """
+        if not self._built:
+            # Requests arriving before the startup build wait for that one
+            self.build(initial=True)
+        prefix = prefix.casefold()
+        with self._lock:
+            keys, counts = self._keys, self._counts
+            matches = []
+            for index in range(bisect_left(keys, (prefix,)), len(keys)):
+                key, skill = keys[index]
+                if not key.startswith(prefix):
+                    break
+                matches.append((counts[skill], skill))
+        best = heapq.nsmallest(limit, matches, key=lambda match: (-match[0], match[1].casefold(), match[1]))
+        return [(skill, count) for count, skill in best]
+
+    def apply_changes(self, changes):
+        """Fold ``(before, after)`` employee pairs into the counts"""
+        delta = Counter()
+        for before, after in changes:
+            old, new = employee_skills(before), employee_skills(after)
+            for skill in new - old:
+                delta[skill] += 1
+            for skill in old - new:
+                delta[skill] -= 1
+
+        with self._lock:
+            self._version += 1
+            if not self._built:
+                return
+            for skill, change in delta.items():
+                if not change:
+                    continue
+                key = (skill.casefold(), skill)
+                count = self._counts.get(skill, 0) + change
+                if count > 0:
+                    if skill not in self._counts:
+                        insort(self._keys, key)
+                    self._counts[skill] = count
+                elif skill in self._counts:
+                    del self._counts[skill]
+                    del self._keys[bisect_left(self._keys, key)]
+
+
+skill_index = SkillIndex()
+
+
+@receiver(employees_changed)
+def update_skill_index(sender, changes, **kwargs):
+    if changes is None:
+        skill_index.refresh()
+    else:
+        skill_index.apply_changes(changes)
@@ -0,0 +1,33 @@
+"""
+Incremental JSON encoding of Mongo cursors.
+
+A ``StreamingHttpResponse`` fed by ``stream_page`` encodes one document at a
+time, so a page is never materialised as one Python list before rendering.
+"""
+
+from django.http import StreamingHttpResponse
+
+from .encoders import dumps
+
+
+def stream_page(documents, pagination):
+    """
+    Yield ``{"results": [...], "pagination": {...}}`` chunk by chunk.
+
+    ``pagination`` may be a callable; it is only evaluated once every
+    document has been sent, so it can depend on what was streamed.
+    """
+    yield b'{"results":['
+    first = True
+    for doc in documents:
+        if not first:
+            yield b','
+        yield dumps(doc)
+        first = False
+    if callable(pagination):
+        pagination = pagination()
+    yield b'],"pagination":' + dumps(pagination) + b'}'
+
+
+def streaming_json_response(chunks, status=200):
+    return StreamingHttpResponse(chunks, status=status, content_type='application/json')
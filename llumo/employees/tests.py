@@ -0,0 +1,155 @@
+"""
+API tests run against mongomock instead of mongod (``pip install mongomock``).
+
+Everything goes through ``employees.mongo``'s shared client, so no Django
+test database is created: the tests are ``SimpleTestCase``s.
+"""
+
+import unittest
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIClient
+
+from employees import mongo, salary_stats
+from employees.pagination import MAX_PAGE_SIZE, InvalidPage, parse_page
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+class ParsePageTests(SimpleTestCase):
+    def test_defaults(self):
+        self.assertEqual(parse_page({}), (1, 10))
+        self.assertEqual(parse_page({'page': '', 'page_size': ''}), (1, 10))
+
+    def test_valid(self):
+        self.assertEqual(parse_page({'page': '3', 'page_size': str(MAX_PAGE_SIZE)}), (3, MAX_PAGE_SIZE))
+
+    def test_invalid(self):
+        for params in ({'page': 'abc'}, {'page_size': '1.5'}, {'page': '0'}, {'page_size': '-1'},
+                       {'page_size': str(MAX_PAGE_SIZE + 1)}):
+            with self.subTest(params=params), self.assertRaises(InvalidPage):
+                parse_page(params)
+
+
+@unittest.skipUnless(mongomock, 'mongomock is not installed')
+@override_settings(ALLOWED_HOSTS=['testserver'], EMPLOYEE_CACHE_ENABLED=False, EMPLOYEE_REPLICA_ENABLED=False,
+                   EMPLOYEE_WRITE_VERSION=False)
+class MongoTestCase(SimpleTestCase):
+    """Runs each test against a fresh in-memory client"""
+
+    def setUp(self):
+        mongo.close_client()
+        mongo.install_client(mongomock.MongoClient())
+        self.addCleanup(mongo.close_client)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User(id=1, username='tester'))
+
+    def seed(self, count):
+        departments = ['Engineering', 'HR', 'Sales']
+        mongo.get_collection().insert_many([
+            {
+                'employee_id': f'E{i:03d}',
+                'name': f'Employee {i}',
+                'department': departments[i % len(departments)],
+                'salary': 40000 + 1000 * i,
+                'joining_date': datetime(2020, 1, 1 + i % 28),
+                'skills': ['Python'] if i % 2 else ['Python', 'MongoDB'],
+            }
+            for i in range(count)
+        ])
+
+
+class ValidationTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seed(5)
+
+    def assertBadRequest(self, response):
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn('error', response.json())
+
+    def test_page_parameters(self):
+        paths = ['/api/employees/', '/api/employees/?pagination=cursor',
+                 '/api/employees/search/?skill=Python', '/api/employees/query/']
+        for path in paths:
+            separator = '&' if '?' in path else '?'
+            for params in ('page=0', 'page=abc', 'page_size=-5', f'page_size={MAX_PAGE_SIZE + 1}'):
+                with self.subTest(path=path, params=params):
+                    self.assertBadRequest(self.client.get(f'{path}{separator}{params}'))
+
+    def test_valid_page(self):
+        response = self.client.get('/api/employees/?page=2&page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_fields(self):
+        self.assertBadRequest(self.client.get('/api/employees/?fields=name,password'))
+        self.assertBadRequest(self.client.get('/api/employees/search/?skill=Python&fields=bogus'))
+
+    def test_count_mode(self):
+        self.assertBadRequest(self.client.get('/api/employees/?count=some'))
+        self.assertBadRequest(self.client.get('/api/employees/search/?skill=Python&count=some'))
+
+    def test_cursor_token(self):
+        self.assertBadRequest(self.client.get('/api/employees/?cursor=not-a-cursor'))
+
+    def test_search_requires_skill(self):
+        self.assertBadRequest(self.client.get('/api/employees/search/'))
+
+    def test_update_body_must_be_object(self):
+        for method in (self.client.put, self.client.patch):
+            with self.subTest(method=method.__name__):
+                self.assertBadRequest(method('/api/employees/E001/', ['salary', 1], format='json'))
+
+    def test_bulk_selection(self):
+        for body in ({}, {'employee_ids': []}, {'employee_ids': 'E001'}, {'filter': {'unknown': 'x'}},
+                     {'filter': {}}, []):
+            with self.subTest(body=body):
+                self.assertBadRequest(self.client.delete('/api/employees/bulk/', body, format='json'))
+        self.assertEqual(mongo.get_collection().count_documents({}), 5)
+
+    def test_bulk_update_body(self):
+        self.assertBadRequest(self.client.patch('/api/employees/bulk/', {'employee_ids': ['E001']}, format='json'))
+        self.assertBadRequest(self.client.patch(
+            '/api/employees/bulk/', {'employee_ids': ['E001'], 'set': {'employee_id': 'E999'}}, format='json'))
+
+
+class SalaryAggregateTests(MongoTestCase):
+    """The incrementally maintained aggregates must match a live $group"""
+
+    def setUp(self):
+        super().setUp()
+        self.seed(9)
+        salary_stats.rebuild()
+
+    def test_apply_changes(self):
+        highest = mongo.get_collection().find_one({'employee_id': 'E008'})
+        moved = dict(highest, department='HR', salary=1000)
+        mongo.get_collection().replace_one({'_id': highest['_id']}, moved)
+        salary_stats.apply_changes([(highest, moved)])
+        self.assertEqual(salary_stats.drift(), [])
+
+    def test_api_writes(self):
+        new = {'employee_id': 'E100', 'name': 'New Hire', 'department': 'Marketing', 'salary': 90000,
+               'joining_date': '2024-05-01', 'skills': ['Go']}
+        self.assertEqual(self.client.post('/api/employees/', new, format='json').status_code, 201)
+        self.assertEqual(salary_stats.drift(), [])
+
+        response = self.client.patch('/api/employees/E003/', {'salary': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(salary_stats.drift(), [])
+
+        response = self.client.patch('/api/employees/E004/', {'department': 'Sales'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(salary_stats.drift(), [])
+
+        # The department's maximum leaves it
+        self.assertEqual(self.client.delete('/api/employees/E100/').status_code, 200)
+        self.assertEqual(self.client.delete('/api/employees/E008/').status_code, 200)
+        self.assertEqual(salary_stats.drift(), [])
+        self.assertNotIn('Marketing', salary_stats.read_stats())
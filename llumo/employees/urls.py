@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import EmployeeViewSet
+from . import async_views
 from .auth_views import UserRegistrationView, UserProfileView
 
 router = DefaultRouter()
@@ -10,4 +11,9 @@ urlpatterns = [
     path('', include(router.urls)),
     path('auth/register/', UserRegistrationView.as_view(), name='user_register'),
     path('auth/profile/', UserProfileView.as_view(), name='user_profile'),
+    # Async (ASGI) variants of the employee endpoints, served through Motor
+    path('async/employees/', async_views.employee_collection, name='async-employee-list'),
+    path('async/employees/search/', async_views.employee_search, name='async-employee-search'),
+    path('async/employees/avg-salary/', async_views.employee_avg_salary, name='async-employee-avg-salary'),
+    path('async/employees/<str:employee_id>/', async_views.employee_detail, name='async-employee-detail'),
 ]
@@ -0,0 +1,176 @@
+"""
+In-process ``$jsonSchema`` validation.
+
+``compile_schema`` turns a ``$jsonSchema`` definition from ``schemas.py``
+into a list of small predicate closures (precompiled regexes, frozenset
+enums, plain range checks), so documents can be checked in Python at a few
+microseconds each instead of relying on the server.
+
+Only the keywords used by the schemas in this project are supported:
+``bsonType``, ``required``, ``properties``, ``pattern``, ``enum``,
+``minimum``/``maximum``, ``minLength``/``maxLength``, ``items`` and
+``uniqueItems``.  Violations are reported as rule names such as
+``employee_id.pattern`` or ``required.salary``.
+"""
+
+import re
+from datetime import date, datetime
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from bson.int64 import Int64
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _is_int(value):
+    return type(value) is int and INT32_MIN <= value <= INT32_MAX
+
+
+def _is_long(value):
+    return isinstance(value, Int64) or (type(value) is int and not _is_int(value))
+
+
+BSON_TYPES = {
+    'string': lambda value: isinstance(value, str),
+    'int': _is_int,
+    'long': _is_long,
+    'double': lambda value: type(value) is float,
+    'decimal': lambda value: isinstance(value, Decimal128),
+    'number': lambda value: (type(value) in (int, float) or isinstance(value, (Int64, Decimal128))),
+    'bool': lambda value: type(value) is bool,
+    # Serializers hand over datetime.date; it is stored as a BSON date
+    'date': lambda value: isinstance(value, (datetime, date)),
+    'array': lambda value: isinstance(value, (list, tuple)),
+    'object': lambda value: isinstance(value, dict),
+    'objectId': lambda value: isinstance(value, ObjectId),
+    'null': lambda value: value is None,
+}
+
+
+def _type_check(bson_type):
+    names = bson_type if isinstance(bson_type, list) else [bson_type]
+    checks = tuple(BSON_TYPES[name] for name in names)
+    if len(checks) == 1:
+        return checks[0]
+    return lambda value: any(check(value) for check in checks)
+
+
+def compile_value(rules):
+    """
+    Compile the keywords for one value into ``[(keyword, predicate), ...]``.
+
+    Each predicate returns True when the value satisfies the keyword.
+    Keywords other than bsonType only apply to values of a matching type,
+    as in MongoDB.
+    """
+    checks = []
+    if 'bsonType' in rules:
+        checks.append(('bsonType', _type_check(rules['bsonType'])))
+
+    if 'pattern' in rules:
+        search = re.compile(rules['pattern']).search
+        checks.append(('pattern', lambda value: not isinstance(value, str) or search(value) is not None))
+    if 'enum' in rules:
+        allowed = frozenset(rules['enum'])
+        checks.append(('enum', lambda value: value in allowed))
+    if 'minLength' in rules:
+        min_length = rules['minLength']
+        checks.append(('minLength', lambda value: not isinstance(value, str) or len(value) >= min_length))
+    if 'maxLength' in rules:
+        max_length = rules['maxLength']
+        checks.append(('maxLength', lambda value: not isinstance(value, str) or len(value) <= max_length))
+    if 'minimum' in rules:
+        minimum = rules['minimum']
+        checks.append(('minimum', lambda value: not _is_numeric(value) or value >= minimum))
+    if 'maximum' in rules:
+        maximum = rules['maximum']
+        checks.append(('maximum', lambda value: not _is_numeric(value) or value <= maximum))
+
+    if 'items' in rules:
+        item_checks = compile_value(rules['items'])
+        for keyword, check in item_checks:
+            checks.append((
+                f'items.{keyword}',
+                lambda value, check=check: not isinstance(value, (list, tuple)) or all(check(item) for item in value)
+            ))
+    if rules.get('uniqueItems'):
+        checks.append(('uniqueItems', _unique_items))
+    return checks
+
+
+def _is_numeric(value):
+    return type(value) in (int, float) or isinstance(value, Int64)
+
+
+def _unique_items(value):
+    if not isinstance(value, (list, tuple)):
+        return True
+    try:
+        return len(set(value)) == len(value)
+    except TypeError:
+        # Unhashable items (nested arrays/objects): compare pairwise
+        return all(value[i] != value[j] for i in range(len(value)) for j in range(i))
+
+
+class CompiledSchema:
+    """Validator built once from a ``{'$jsonSchema': ...}`` definition"""
+
+    def __init__(self, schema):
+        json_schema = schema.get('$jsonSchema', schema)
+        self.required = tuple(json_schema.get('required', ()))
+        self.properties = {
+            name: compile_value(rules)
+            for name, rules in json_schema.get('properties', {}).items()
+        }
+        self.fields = tuple(self.properties)
+        self.descriptions = {
+            name: rules.get('description')
+            for name, rules in json_schema.get('properties', {}).items()
+        }
+
+    def violations(self, doc, partial=False):
+        """
+        Rule names the document breaks, empty when it is valid.
+
+        With ``partial=True`` missing required fields are not reported, for
+        partial updates.
+        """
+        errors = []
+        if not partial:
+            for name in self.required:
+                if name not in doc:
+                    errors.append(f'required.{name}')
+        for name, checks in self.properties.items():
+            if name not in doc:
+                continue
+            value = doc[name]
+            for keyword, check in checks:
+                if not check(value):
+                    errors.append(f'{name}.{keyword}')
+                    if keyword == 'bsonType':
+                        # Other keywords are meaningless for the wrong type
+                        break
+        return errors
+
+    def is_valid(self, doc, partial=False):
+        return not self.violations(doc, partial)
+
+    def errors(self, doc, partial=False):
+        """Violations as ``{field: [message]}``, in DRF's error format"""
+        errors = {}
+        for rule in self.violations(doc, partial):
+            if rule.startswith('required.'):
+                field = rule[len('required.'):]
+                message = 'This field is required.'
+            else:
+                field = rule.split('.', 1)[0]
+                message = self.descriptions.get(field) or f'Violates {rule}.'
+            messages = errors.setdefault(field, [])
+            if message not in messages:
+                messages.append(message)
+        return errors
+
+
+def compile_schema(schema):
+    return CompiledSchema(schema)
@@ -1,141 +1,449 @@
 from rest_framework import viewsets
 from .models import Employee
-from .serializers import EmployeeSerializer
+from .serializers import EmployeeSerializer, EmployeeWriteSerializer
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db import connection
-from pymongo import MongoClient
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from . import bulk as bulk_ops, salary_stats
+from .authentication import CachedJWTAuthentication
+from .caching import cached_response
+from .facets import InvalidQuery, build_match, build_sort, run_query, split_values
+from .instrumentation import timed
+from .mongo import get_collection
+from .parsers import NDJSONParser
+from .pagination import (COUNT_MODES, EXACT, LIST_SORT, InvalidCursor, InvalidPage, cached_count,
+                         cursor_page, offset_page, parse_page)
+from .projection import InvalidFields, parse_fields, projected_fields
+from .replica import replica
+from .repository import DuplicateEmployee, EmployeeRepository, to_instance
+from .renderers import EXPORT_FIELDS, CSVRenderer, MongoJSONRenderer, NDJSONRenderer
+from .signals import employees_changed
+from .skills import skill_index
+from .streaming import stream_page, streaming_json_response
+
+def parse_skills(query_params):
+    """Skills from ?skill=Python&skill=Django or ?skill=Python,Django"""
+    return split_values(query_params, 'skill')
+
+
+def skills_query(skills, match='all'):
+    """Mongo query against the multikey skills index"""
+    if len(skills) == 1:
+        return {"skills": skills[0]}
+    return {"skills": {"$all" if match == 'all' else "$in": skills}}
+
+
+def department_query(query_params):
+    """Mongo filter for the query parameters shared by list and export"""
+    department = query_params.get('department')
+    
+    # Build query
+    query = {}
+    if department:
+        query["department"] = department
+    return query
+
 
 class EmployeeViewSet(viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     lookup_field = 'employee_id'
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = [MongoJSONRenderer, BrowsableAPIRenderer]
+
+    def perform_authentication(self, request):
+        with timed('auth'):
+            super().perform_authentication(request)
+
     @action(detail=False, methods=['get'], url_path='search')
+    @cached_response('search')
     def search(self, request):
-        skill = request.query_params.get('skill')
-        if not skill:
+        skills = parse_skills(request.query_params)
+        if not skills:
             return Response({'error': 'Skill parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        client = MongoClient(connection.settings_dict['CLIENT']['host'])
-        db = client.get_database(connection.settings_dict['NAME'])
-        
-        # Mongo query: check if skill exists in skills array
-        employees = list(db.employees.find({"skills": skill}))
-        # Convert ObjectId to string for JSON serialization
-        for emp in employees:
-            emp['_id'] = str(emp['_id'])
+        match = request.query_params.get('match', 'all')
+        if match not in ('all', 'any'):
+            return Response({'error': 'match must be "all" or "any".'}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(employees)
+        try:
+            projection = parse_fields(request.query_params.get('fields'))
+        except InvalidFields as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page, page_size = parse_page(request.query_params)
+        except InvalidPage as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        query = skills_query(skills, match)
+        collection = get_collection()
+        snapshot, rows = self.replica_rows(query)
+
+        # Same pagination contract as list: page= or cursor tokens
+        token = request.query_params.get('cursor')
+        if token or request.query_params.get('pagination') == 'cursor':
+            try:
+                if snapshot is not None:
+                    employees, pagination = snapshot.cursor_page(query, rows, page_size, token, projection)
+                else:
+                    employees, pagination = cursor_page(collection, query, page_size, token, projection)
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            count = request.query_params.get('count', EXACT)
+            if count not in COUNT_MODES:
+                return Response({'error': 'count must be "exact", "estimated" or "none".'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if snapshot is not None:
+                employees, pagination = snapshot.offset_page(rows, page, page_size, projection, count)
+            else:
+                employees, pagination = offset_page(collection, query, page, page_size, projection, count)
+
+        # Documents are encoded one at a time as the cursor yields them
+        return streaming_json_response(stream_page(employees, pagination))
+
+    @action(detail=False, methods=['get'], url_path='query')
+    @cached_response('query')
+    def query(self, request):
+        """
+        Combined filters (department, salary and joining-date ranges, skills)
+        with sorting, one page of results and facet counts, all from a single
+        aggregation.
+        """
+        params = request.query_params
+        try:
+            match = build_match(params)
+            sort = build_sort(params.get('sort'))
+            projection = parse_fields(params.get('fields'))
+            page, page_size = parse_page(params)
+        except (InvalidQuery, InvalidFields, InvalidPage) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        facets = params.get('facets', 'true').lower() not in ('0', 'false', 'no')
+        employees, pagination, facet_counts = run_query(
+            get_collection(), match, sort, page, page_size, projection, facets)
+
+        response_data = {'results': employees, 'pagination': pagination}
+        if facets:
+            response_data['facets'] = facet_counts
+        return Response(response_data)
+
+    @action(detail=False, methods=['get'], url_path='skills')
+    def skills(self, request):
+        """Type-ahead over distinct skills, from the in-memory skill index"""
+        prefix = request.query_params.get('prefix', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= 100:
+            return Response({'error': 'limit must be between 1 and 100.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = skill_index.lookup(prefix, limit)
+        return Response([{'skill': skill, 'employee_count': count} for skill, count in matches])
+
+    @action(detail=False, methods=['get'], url_path='salary-stats')
+    @cached_response('salary-stats')
+    def salary_distribution(self, request):
+        """Salary distribution (percentiles, histogram) per department or joining year"""
+        group_by = request.query_params.get('group_by', 'department')
+        if group_by not in salary_stats.GROUP_KEYS:
+            return Response({'error': 'group_by must be "department" or "joining_year".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            resolution = int(request.query_params.get('resolution', 1))
+        except ValueError:
+            resolution = 0
+        if resolution < 1:
+            return Response({'error': 'resolution must be a positive integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(salary_stats.distribution(group_by, resolution))
 
-        
     @action(detail=False, methods=['get'], url_path='avg-salary')
+    @cached_response('avg-salary')
     def avg_salary(self, request):
-        from django.db import connection
-        # Using Djongo, but aggregation via MongoDB driver
-        from pymongo import MongoClient
-        client = MongoClient(connection.settings_dict['CLIENT']['host'])
-        db = client.get_database(connection.settings_dict['NAME'])
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$department',
-                    'avg_salary': {'$avg': '$salary'}
-                }
-            }
-        ]
-        result = list(db.employees.aggregate(pipeline))
-        output = [
-            {
-                'department': r['_id'],
-                'avg_salary': int(r['avg_salary'])
-            } for r in result
-        ]
-        return Response(output)
+        # Served from the materialized per-department aggregates, which are
+        # maintained incrementally on every employee write
+        exact = request.query_params.get('exact', '').lower() in ('1', 'true', 'yes')
+        snapshot = replica.current()
+        stats = snapshot.salary_stats if snapshot is not None else salary_stats.read_stats()
+        return Response(salary_stats.summarize(stats, exact))
 
+    @cached_response('list')
     def list(self, request, *args, **kwargs):
-        department = request.query_params.get('department')
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
-        
-        # Calculate skip value for pagination
-        skip = (page - 1) * page_size
-        
-        client = MongoClient(connection.settings_dict['CLIENT']['host'])
-        db = client.get_database(connection.settings_dict['NAME'])
-        
-        # Build query
-        query = {}
-        if department:
-            query["department"] = department
+        try:
+            projection = parse_fields(request.query_params.get('fields'))
+            page, page_size = parse_page(request.query_params)
+        except (InvalidFields, InvalidPage) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get total count for pagination metadata
-        total_count = db.employees.count_documents(query)
+        collection = get_collection()
+        query = self.filter_query(request)
+        snapshot, rows = self.replica_rows(query)
         
-        # Get paginated employees
-        employees = list(db.employees.find(query)
-                        .sort("joining_date", -1)
-                        .skip(skip)
-                        .limit(page_size))
+        # Keyset pagination is opt-in: ?pagination=cursor for the first page,
+        # then follow the next/previous tokens with ?cursor=
+        token = request.query_params.get('cursor')
+        if token or request.query_params.get('pagination') == 'cursor':
+            return self.cursor_list(request, collection, query, page_size, token, snapshot, rows, projection)
         
-        # Convert ObjectId to string for JSON serialization
-        for emp in employees:
-            emp['_id'] = str(emp['_id'])
-            if 'joining_date' in emp and '$date' in str(emp['joining_date']):
-                emp['joining_date'] = emp['joining_date']
+        # ?count=exact (default) overlaps the count with the page fetch,
+        # estimated approximates it cheaply, none skips it
+        count = request.query_params.get('count', EXACT)
+        if count not in COUNT_MODES:
+            return Response({'error': 'count must be "exact", "estimated" or "none".'},
+                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate pagination metadata
-        total_pages = (total_count + page_size - 1) // page_size
-        has_next = page < total_pages
-        has_previous = page > 1
+        if snapshot is not None:
+            employees, pagination = snapshot.offset_page(rows, page, page_size, projection, count)
+        else:
+            employees, pagination = offset_page(collection, query, page, page_size, projection, count)
+        employees = list(employees)
         
+        # MongoJSONRenderer encodes ObjectId/datetime values directly
         response_data = {
             'results': employees,
-            'pagination': {
-                'current_page': page,
-                'page_size': page_size,
-                'total_count': total_count,
-                'total_pages': total_pages,
-                'has_next': has_next,
-                'has_previous': has_previous
-            }
+            'pagination': pagination()
         }
         
         return Response(response_data)
 
+    def filter_query(self, request):
+        return department_query(request.query_params)
+
+    def replica_rows(self, query):
+        """
+        ``(snapshot, rows)`` when the in-memory replica is enabled, current
+        and able to answer ``query``; ``(None, None)`` otherwise.
+        """
+        snapshot = replica.current()
+        rows = snapshot.rows(query) if snapshot is not None else None
+        if rows is None:
+            return None, None
+        return snapshot, rows
+
+    @action(detail=False, methods=['get'], url_path='export',
+            renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Stream every matching employee as NDJSON or CSV from a single cursor,
+        so memory stays flat regardless of collection size.
+        """
+        renderer = request.accepted_renderer
+        try:
+            projection = parse_fields(request.query_params.get('fields'))
+        except InvalidFields as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        documents = (get_collection()
+                     .find(self.filter_query(request), projection or {'_id': 0})
+                     .sort(LIST_SORT)
+                     .batch_size(getattr(settings, 'EMPLOYEE_EXPORT_BATCH_SIZE', 1000)))
+        
+        response = StreamingHttpResponse(
+            renderer.stream(documents, projected_fields(projection) if projection else EXPORT_FIELDS),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="employees.{renderer.format}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Create many employees in one request from a JSON array or NDJSON body.
+        With ?mode=upsert existing employees are updated instead of rejected.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'error': 'Expected a JSON array or NDJSON body.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        mode = request.query_params.get('mode', 'create')
+        if mode not in ('create', 'upsert'):
+            return Response({'error': 'mode must be "create" or "upsert".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        max_rows = getattr(settings, 'EMPLOYEE_BULK_MAX_ROWS', 10000)
+        if len(rows) > max_rows:
+            return Response({'error': f'At most {max_rows} rows per request.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validate every row in memory before touching the database
+        results = [None] * len(rows)
+        documents, positions = [], []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                results[index] = {'index': index, 'status': 'invalid', 'errors': 'Expected an object.'}
+                continue
+            serializer = EmployeeWriteSerializer(data=row)
+            if serializer.is_valid():
+                documents.append(bulk_ops.to_document(serializer.validated_data))
+                positions.append(index)
+            else:
+                results[index] = {'index': index, 'employee_id': row.get('employee_id'),
+                                  'status': 'invalid', 'errors': serializer.errors}
+
+        before = {}
+        if mode == 'upsert' and documents:
+            before = bulk_ops.existing_documents(doc['employee_id'] for doc in documents)
+
+        outcomes = bulk_ops.write_documents(documents, upsert=(mode == 'upsert'))
+
+        changes = []
+        for index, doc, (outcome, message) in zip(positions, documents, outcomes):
+            results[index] = {'index': index, 'employee_id': doc['employee_id'], 'status': outcome}
+            if message:
+                results[index]['errors'] = message
+            if outcome in ('created', 'updated'):
+                previous = before.get(doc['employee_id'])
+                changes.append((previous, dict(previous or {}, **doc)))
+        if changes:
+            employees_changed.send(sender=self.__class__, changes=changes)
+
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        succeeded = summary.get('created', 0) + summary.get('updated', 0)
+        response_status = status.HTTP_201_CREATED if succeeded == len(rows) else status.HTTP_207_MULTI_STATUS
+        return Response({'summary': summary, 'results': results}, status=response_status)
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """
+        Update every employee selected by ``employee_ids`` and/or ``filter``
+        in one update_many: ``set`` assigns fields, ``salary_increase_pct``
+        changes salaries by a percentage.
+        """
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fields = data.get('set') or {}
+        percent = data.get('salary_increase_pct')
+        if not isinstance(fields, dict):
+            return Response({'error': 'set must be an object.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not fields and percent is None:
+            return Response({'error': 'Provide set and/or salary_increase_pct.'}, status=status.HTTP_400_BAD_REQUEST)
+        if 'employee_id' in fields:
+            return Response({'error': 'employee_id cannot be changed'}, status=status.HTTP_400_BAD_REQUEST)
+        if percent is not None:
+            if isinstance(percent, bool) or not isinstance(percent, (int, float)) or percent <= -100:
+                return Response({'error': 'salary_increase_pct must be a number greater than -100.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if 'salary' in fields:
+                return Response({'error': 'Use either set.salary or salary_increase_pct.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = EmployeeWriteSerializer(data=fields, partial=True)
+        unknown = [name for name in fields if name not in serializer.fields or serializer.fields[name].read_only]
+        if unknown:
+            return Response({'error': f"Unknown field(s) in set: {', '.join(unknown)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            query = bulk_ops.selection_query(data, getattr(settings, 'EMPLOYEE_BULK_MAX_ROWS', 10000))
+            matched, modified = bulk_ops.update_employees(
+                query, bulk_ops.to_document(serializer.validated_data), percent)
+        except InvalidQuery as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if modified:
+            # Any number of employees may have changed: derived data is rebuilt
+            employees_changed.send(sender=self.__class__, changes=None)
+        return Response({'matched': matched, 'modified': modified})
+
+    @bulk.mapping.delete
+    def bulk_delete(self, request):
+        """Delete every employee selected by ``employee_ids`` and/or ``filter``"""
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({'error': 'Expected a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            query = bulk_ops.selection_query(data, getattr(settings, 'EMPLOYEE_BULK_MAX_ROWS', 10000))
+        except InvalidQuery as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        deleted = bulk_ops.delete_employees(query)
+        if deleted:
+            employees_changed.send(sender=self.__class__, changes=None)
+        return Response({'deleted': deleted})
+
+    def cursor_list(self, request, collection, query, page_size, token, snapshot=None, rows=None,
+                    projection=None):
+        """List employees with keyset pagination (opaque next/previous tokens)"""
+        try:
+            if snapshot is not None:
+                employees, pagination = snapshot.cursor_page(query, rows, page_size, token, projection)
+            else:
+                employees, pagination = cursor_page(collection, query, page_size, token, projection)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Counting is optional in cursor mode and served from a short-lived cache
+        if request.query_params.get('include_count', '').lower() in ('1', 'true', 'yes'):
+            pagination['total_count'] = len(rows) if snapshot is not None else cached_count(collection, query)
+        
+        return Response({'results': employees, 'pagination': pagination})
+
     def create(self, request, *args, **kwargs):
-        employee_id = request.data.get('employee_id')
-        if Employee.objects.filter(employee_id=employee_id).exists():
+        serializer = EmployeeWriteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        doc = bulk_ops.to_document(serializer.validated_data)
+        try:
+            EmployeeRepository().insert(doc)
+        except DuplicateEmployee:
             return Response({'error': 'employee_id must be unique'}, status=status.HTTP_400_BAD_REQUEST)
-        return super().create(request, *args, **kwargs)
+        employees_changed.send(sender=self.__class__, changes=[(None, doc)])
+        return Response(EmployeeSerializer(to_instance(doc)).data, status=status.HTTP_201_CREATED)
 
-        def retrieve(self, request, employee_id=None):
-            try:
-                employee = Employee.objects.get(employee_id=employee_id)
-            except Employee.DoesNotExist:
-                return Response({'error': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
-            serializer = EmployeeSerializer(employee)
-            return Response(serializer.data)
+    def retrieve(self, request, employee_id=None):
+        try:
+            projection = parse_fields(request.query_params.get('fields'))
+        except InvalidFields as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        def update(self, request, employee_id=None):
-            try:
-                employee = Employee.objects.get(employee_id=employee_id)
-            except Employee.DoesNotExist:
-                return Response({'error': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
-            serializer = EmployeeSerializer(employee, data=request.data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
+        snapshot = replica.current()
+        if snapshot is not None:
+            employee = snapshot.get(employee_id, projection or EmployeeRepository.projection)
+        else:
+            employee = EmployeeRepository().get(employee_id, projection)
+        if employee is None:
+            return Response({'error': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
+        fields = projected_fields(projection) if projection else None
+        serializer = EmployeeSerializer(to_instance(employee), fields=fields)
+        return Response(serializer.data)
+
+    def update(self, request, employee_id=None, partial=False):
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+        data = request.data.copy()
+        if data.get('employee_id', employee_id) != employee_id:
+            return Response({'error': 'employee_id cannot be changed'}, status=status.HTTP_400_BAD_REQUEST)
+        data['employee_id'] = employee_id
+        serializer = EmployeeWriteSerializer(data=data, partial=partial)
+        if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+        result = EmployeeRepository().update(employee_id, bulk_ops.to_document(serializer.validated_data))
+        if result is None:
+            return Response({'error': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
+        employees_changed.send(sender=self.__class__, changes=[result])
+        return Response(EmployeeSerializer(to_instance(result[1])).data)
+
+    def partial_update(self, request, employee_id=None):
+        return self.update(request, employee_id, partial=True)
+
     def destroy(self, request, employee_id=None):
-        try:
-            employee = Employee.objects.get(employee_id=employee_id)
-        except Employee.DoesNotExist:
+        before = EmployeeRepository().delete(employee_id)
+        if before is None:
             return Response({'error': 'Employee not found'}, status=status.HTTP_404_NOT_FOUND)
-        employee.delete()
+        employees_changed.send(sender=self.__class__, changes=[(before, None)])
         return Response({'success': 'Employee deleted successfully'}, status=status.HTTP_200_OK)
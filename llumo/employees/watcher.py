@@ -0,0 +1,349 @@
+"""
+Change-stream watcher for the employees collection.
+
+The response cache, the salary aggregates and the skill index are kept
+current from ``employees_changed``, which only fires for writes made through
+this process.  ``ChangeWatcher`` follows the collection's change stream
+instead, so writes from other workers, other services or a mongo shell reach
+the same receivers, as ``employees_changed(changes=None, source='watcher')``
+(one signal per batch of events, with the written ``employee_ids`` when the
+events tell them).
+
+Two kinds of watcher run:
+
+- The ``watch_employees`` command runs one named watcher.  It persists its
+  resume token in ``employee_watcher_state``, so a restart picks up where it
+  stopped, and it is the one that refreshes the shared salary aggregates.
+- With ``EMPLOYEE_CHANGE_WATCHER`` on, every API process runs an anonymous
+  watcher thread that starts from "now" and only refreshes per-process data
+  (local-memory cache generation, skill index).  It skips the events of
+  writes the process already announced through ``employees_changed``
+  (``OwnWrites``), so a write does not also cost a full refresh in the
+  process that made it.
+
+Change streams need a replica set.  On a standalone server the watch fails
+with code 40573 and the watcher polls instead, comparing ``fingerprint()``
+every ``EMPLOYEE_WATCHER_INTERVAL`` seconds: a version counter in
+``employee_watcher_state``, the document count and the newest ``_id``.
+The counter is bumped by writes made through ``employees_changed`` in
+processes with ``EMPLOYEE_WRITE_VERSION`` on, so polling sees those writes
+plus inserts and deletes from any writer, but not in-place updates made
+outside the API.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.dispatch import receiver
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .mongo import get_collection
+from .signals import employees_changed
+
+logger = logging.getLogger(__name__)
+
+STATE_COLLECTION = 'employee_watcher_state'
+WRITE_VERSION_ID = 'write_version'
+
+SOURCE = 'watcher'
+
+# "The $changeStream stage is only supported on replica sets"
+CHANGE_STREAM_UNSUPPORTED = 40573
+# The resume token is no longer in the oplog
+HISTORY_LOST = (280, 286)
+
+# Events per signal at most
+MAX_BATCH = 1000
+
+# How long a write announced by this process waits for its change event
+OWN_WRITE_TTL = 60
+
+SALARY_FIELDS = {'department', 'salary'}
+
+# Keep what affected_departments() and changed_employees() read;
+# updateLookup documents can be large
+PIPELINE = [
+    {'$project': {
+        'operationType': 1,
+        'updateDescription': 1,
+        'fullDocument.department': 1,
+        'fullDocument.employee_id': 1,
+        'documentKey': 1,
+    }},
+]
+
+
+def state_collection():
+    return get_collection(STATE_COLLECTION)
+
+
+def write_version():
+    doc = state_collection().find_one({'_id': WRITE_VERSION_ID})
+    return doc['version'] if doc else 0
+
+
+def bump_write_version(sender, source=None, **kwargs):
+    """Let polling watchers (and other processes) notice writes made here"""
+    if source != SOURCE:
+        state_collection().update_one({'_id': WRITE_VERSION_ID}, {'$inc': {'version': 1}}, upsert=True)
+
+
+def connect_write_version_receiver():
+    """
+    The counter costs a round trip per write, so it is only kept when
+    something reads it (``EMPLOYEE_WRITE_VERSION``, on by default with the
+    change watcher or the replica).
+    """
+    if getattr(settings, 'EMPLOYEE_WRITE_VERSION', False):
+        employees_changed.connect(bump_write_version, dispatch_uid='employees.bump_write_version')
+
+
+def fingerprint():
+    """What polling compares: write version, document count and newest _id"""
+    newest = get_collection().find_one({}, {'_id': 1}, sort=[('_id', -1)])
+    return [write_version(), get_collection().estimated_document_count(), newest and newest['_id']]
+
+
+class OwnWrites:
+    """
+    Writes this process announced through ``employees_changed``, each
+    waiting to be matched (once) by its change event: updates and inserts by
+    ``employee_id``, deletes by ``_id``.  Another process's write to the
+    same employee may take the match instead; the event for ours then comes
+    through, which only costs a refresh.
+    """
+
+    def __init__(self, ttl=OWN_WRITE_TTL):
+        self.ttl = ttl
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, changes):
+        now = time.monotonic()
+        keys = []
+        for before, after in changes:
+            if after is not None and 'employee_id' in after:
+                keys.append(('employee_id', after['employee_id']))
+            elif after is None and before is not None and '_id' in before:
+                keys.append(('_id', before['_id']))
+        with self._lock:
+            if len(self._pending) > 10000:
+                # Writes whose event never came (no-op updates)
+                self._pending = {key: entry for key, entry in self._pending.items() if entry[1] > now}
+            for key in keys:
+                count, _ = self._pending.get(key, (0, None))
+                self._pending[key] = (count + 1, now + self.ttl)
+
+    def consume(self, event):
+        """True when ``event`` is the change of a write announced here"""
+        operation = event['operationType']
+        if operation == 'delete':
+            key = ('_id', (event.get('documentKey') or {}).get('_id'))
+        elif operation in ('insert', 'update', 'replace') and event.get('fullDocument'):
+            key = ('employee_id', event['fullDocument'].get('employee_id'))
+        else:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                return False
+            count, expires = entry
+            if count > 1 and expires >= now:
+                self._pending[key] = (count - 1, expires)
+            else:
+                del self._pending[key]
+            return expires >= now
+
+
+own_writes = OwnWrites()
+
+
+@receiver(employees_changed)
+def remember_own_writes(sender, changes, source=None, **kwargs):
+    if changes is not None and source != SOURCE and _background is not None:
+        own_writes.add(changes)
+
+
+def affected_departments(events):
+    """
+    Departments whose salary figures the events may have changed, or None
+    when that cannot be told (deletes and replaces carry no old document).
+    """
+    departments = set()
+    for event in events:
+        operation = event['operationType']
+        if operation == 'update':
+            description = event.get('updateDescription') or {}
+            touched = set(description.get('updatedFields', {})) | set(description.get('removedFields', []))
+            if not touched & SALARY_FIELDS:
+                continue
+            if 'department' in touched:
+                return None
+        elif operation != 'insert':
+            return None
+        document = event.get('fullDocument')
+        if document is None:
+            # Deleted again before the lookup
+            return None
+        departments.add(document.get('department'))
+    return departments
+
+
+def changed_employees(events):
+    """
+    ``employee_id`` of every employee the events wrote, or None when that
+    cannot be told (deletes and renames carry no old document).
+    """
+    employee_ids = set()
+    for event in events:
+        document = event.get('fullDocument')
+        if event['operationType'] not in ('insert', 'update', 'replace') or document is None:
+            return None
+        description = event.get('updateDescription') or {}
+        if 'employee_id' not in document or 'employee_id' in description.get('updatedFields', {}):
+            # A renamed employee leaves its old id behind
+            return None
+        employee_ids.add(document['employee_id'])
+    return employee_ids
+
+
+class ChangeWatcher:
+    """
+    Follows the employees collection until ``stop()`` is called.
+
+    ``name`` identifies the persisted state; an anonymous watcher keeps its
+    resume token in memory only.
+    """
+
+    def __init__(self, name=None, interval=None, poll=False):
+        self.name = name
+        self.interval = interval or getattr(settings, 'EMPLOYEE_WATCHER_INTERVAL', 1.0)
+        self.force_poll = poll
+        self.mode = None
+        self.published = 0
+        self._token = None
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def load_state(self):
+        if self.name is None:
+            return {}
+        return state_collection().find_one({'_id': self.name}) or {}
+
+    def save_state(self, **fields):
+        if self.name is not None:
+            state_collection().update_one(
+                {'_id': self.name}, {'$set': dict(fields, updated_at=datetime.utcnow())}, upsert=True)
+
+    def reset(self):
+        """Forget the persisted position; the next run starts from now"""
+        self._token = None
+        if self.name is not None:
+            state_collection().delete_one({'_id': self.name})
+
+    def publish(self, departments=None, employee_ids=None):
+        self.published += 1
+        employees_changed.send(sender=ChangeWatcher, changes=None, source=SOURCE, departments=departments,
+                               employee_ids=employee_ids, shared=self.name is not None)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                if self.force_poll:
+                    return self.poll()
+                self.follow()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    logger.info('Change streams unavailable, polling every %ss', self.interval)
+                    return self.poll()
+                if e.code in HISTORY_LOST:
+                    logger.warning('Resume token expired; restarting the watch with a full refresh')
+                    self.reset()
+                    self.publish()
+                    continue
+                logger.exception('Change stream failed')
+                self._stop.wait(self.interval)
+            except PyMongoError:
+                logger.exception('Change stream failed')
+                self._stop.wait(self.interval)
+
+    def follow(self):
+        self.mode = 'change_stream'
+        options = {'full_document': 'updateLookup', 'max_await_time_ms': int(self.interval * 1000)}
+        if self._token is None:
+            self._token = self.load_state().get('resume_token')
+            if self._token is None and self.name is not None:
+                # Nothing tells what was missed before this first run
+                self.publish()
+        if self._token is not None:
+            options['resume_after'] = self._token
+
+        with get_collection().watch(PIPELINE, **options) as stream:
+            while not self._stop.is_set() and stream.alive:
+                events = []
+                change = stream.try_next()
+                while change is not None:
+                    events.append(change)
+                    if change['operationType'] == 'invalidate' or len(events) >= MAX_BATCH:
+                        break
+                    change = stream.try_next()
+                if not events:
+                    continue
+
+                if events[-1]['operationType'] == 'invalidate':
+                    # The collection was dropped or renamed: start over
+                    self.reset()
+                    self.publish()
+                    return
+                if self.name is None:
+                    # Receivers here already handled this process's own writes
+                    events = [event for event in events if not own_writes.consume(event)]
+                if events:
+                    self.publish(affected_departments(events), changed_employees(events))
+                self._token = stream.resume_token
+                self.save_state(resume_token=self._token)
+
+    def poll(self):
+        """
+        Standalone fallback: publish a full refresh when ``fingerprint()``
+        moves.  In-place updates that bypass ``employees_changed`` are not
+        seen here; the TTLs still cover them.
+        """
+        self.mode = 'poll'
+        last = self.load_state().get('fingerprint')
+        while not self._stop.is_set():
+            current = fingerprint()
+            if current != last:
+                if last is not None or self.name is not None:
+                    self.publish()
+                last = current
+                self.save_state(fingerprint=current)
+            self._stop.wait(self.interval)
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def start_background_watcher():
+    """
+    Start this process's anonymous watcher thread, when
+    ``EMPLOYEE_CHANGE_WATCHER`` is on.  Called from the WSGI/ASGI entry
+    points, so management commands never start one.
+    """
+    global _background
+
+    if not getattr(settings, 'EMPLOYEE_CHANGE_WATCHER', False):
+        return None
+    with _background_lock:
+        if _background is None:
+            watcher = ChangeWatcher()
+            threading.Thread(target=watcher.run, name='employee-change-watcher', daemon=True).start()
+            _background = watcher
+    return _background
@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'llumo.settings')
 
 application = get_asgi_application()
+
+# Follow writes made by other processes (EMPLOYEE_CHANGE_WATCHER)
+from employees.watcher import start_background_watcher  # noqa: E402
+
+start_background_watcher()
+
+# Build the skill index before the first type-ahead request needs it
+from employees.skills import skill_index  # noqa: E402
+
+skill_index.refresh()
@@ -46,10 +46,11 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework_simplejwt',
-    'employees',
+    'employees.apps.EmployeesConfig',
 ]
 
 MIDDLEWARE = [
+    'employees.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,12 +88,70 @@ DATABASES = {
         'ENGINE': 'djongo',
         'NAME': 'assessment_db',
         'CLIENT': {
-            'host': MONGO_URI
+            'host': MONGO_URI,
+            # Connection pool shared by Djongo and employees.mongo.get_client()
+            'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', 100)),
+            'minPoolSize': int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+            'waitQueueTimeoutMS': int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000)),
+            'connectTimeoutMS': int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+            'socketTimeoutMS': int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 10000)),
+            'serverSelectionTimeoutMS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000)),
         }
     }
 }
 
 
+# Caches
+# Employee read endpoints cache rendered responses here; point
+# EMPLOYEE_CACHE_ALIAS at a shared backend to invalidate across workers
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+EMPLOYEE_CACHE_ALIAS = os.getenv('EMPLOYEE_CACHE_ALIAS', 'default')
+EMPLOYEE_CACHE_TTL = int(os.getenv('EMPLOYEE_CACHE_TTL', 30))
+
+# Threads counting ?count=exact totals next to the page fetch; match the
+# server's request threads per process (requests beyond that count inline)
+EMPLOYEE_COUNT_WORKERS = int(os.getenv('EMPLOYEE_COUNT_WORKERS', 8))
+
+# Each API process follows the employees change stream (or polls on a
+# standalone server) and drops its derived data when another process writes
+EMPLOYEE_CHANGE_WATCHER = os.getenv('EMPLOYEE_CHANGE_WATCHER', 'False').lower() in ('1', 'true', 'yes')
+EMPLOYEE_WATCHER_INTERVAL = float(os.getenv('EMPLOYEE_WATCHER_INTERVAL', 1.0))
+
+# Serve list/search/retrieve/avg-salary from a per-process in-memory copy of
+# the collection (employees.replica), checked for writes every interval.
+# Writes are applied to the copy as they happen; a full reload (at most once
+# per reload interval) follows writes from other processes, or once more than
+# max-delta employees have changed since the last load
+EMPLOYEE_REPLICA_ENABLED = os.getenv('EMPLOYEE_REPLICA_ENABLED', 'False').lower() in ('1', 'true', 'yes')
+EMPLOYEE_REPLICA_INTERVAL = float(os.getenv('EMPLOYEE_REPLICA_INTERVAL', 1.0))
+EMPLOYEE_REPLICA_RELOAD_INTERVAL = float(os.getenv('EMPLOYEE_REPLICA_RELOAD_INTERVAL', 30.0))
+EMPLOYEE_REPLICA_MAX_DELTA = int(os.getenv('EMPLOYEE_REPLICA_MAX_DELTA', 1000))
+
+# Count API writes in employee_watcher_state for polling watchers and the
+# replica (one extra round trip per write); needed by every API process when
+# a separate `watch_employees --poll` runs
+EMPLOYEE_WRITE_VERSION = os.getenv(
+    'EMPLOYEE_WRITE_VERSION', str(EMPLOYEE_CHANGE_WATCHER or EMPLOYEE_REPLICA_ENABLED)
+).lower() in ('1', 'true', 'yes')
+
+
+# Performance instrumentation
+# Fraction of requests traced in detail (Server-Timing, phase histograms);
+# command sizes cost a BSON encode per Mongo command and are off by default.
+# /metrics is off unless METRICS_TOKEN is set, and then needs it as a
+# bearer token
+
+PERFORMANCE_SAMPLE_RATE = float(os.getenv('PERFORMANCE_SAMPLE_RATE', 0.01))
+PERFORMANCE_MONGO_BYTES = os.getenv('PERFORMANCE_MONGO_BYTES', 'False').lower() in ('1', 'true', 'yes')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -137,7 +196,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'employees.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -178,6 +237,12 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Verified access tokens and their users are cached per process
+# (employees.authentication); the TTL also bounds how long a change made in
+# another process, or any other revocation, can go unnoticed
+EMPLOYEE_AUTH_CACHE_SIZE = int(os.getenv('EMPLOYEE_AUTH_CACHE_SIZE', 10000))
+EMPLOYEE_AUTH_CACHE_TTL = int(os.getenv('EMPLOYEE_AUTH_CACHE_TTL', 300))
+
 class MongoConnectionCheck:
     @staticmethod
     def check():